@@ -0,0 +1,170 @@
+# asset_pack.py
+"""
+Baked asset pack: every image under resources/ as raw RGBA pixels (plus the sprite mip
+levels and the pre-scaled textures the game asks for), and the sound files, in one
+file that is memory-mapped at runtime. Surfaces are then made straight from the
+mapped bytes instead of decoding PNGs.
+
+    python asset_pack.py              # bake resources/ into resources/<ASSET_PACK>
+
+Layout: header (magic, version, manifest length), a JSON manifest, then the blobs,
+each aligned to ALIGN bytes. Re-bake after changing resources/ or the window size.
+"""
+import os
+import json
+import mmap
+import struct
+import pygame as pg
+from settings import ASSET_PACK
+from utils.resource_path import resource_path
+
+MAGIC = b'DOOMPAK\0'
+VERSION = 1
+HEADER = struct.Struct('<8sII')
+ALIGN = 64
+SOUND_EXTENSIONS = ('.wav',)
+
+
+def align(offset):
+    return -(-offset // ALIGN) * ALIGN
+
+
+def pack_key(path, root):
+    """Manifest key of `path`: its path under `root` with '/' separators."""
+    return os.path.relpath(path, root).replace(os.sep, '/')
+
+
+class AssetPack:
+    """Read side: a memory-mapped pack and its manifest (see assets.get_pack)."""
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f:
+            self.data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, manifest_length = HEADER.unpack_from(self.data)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f'not a version {VERSION} asset pack')
+        manifest_start = HEADER.size
+        self.manifest = json.loads(self.data[manifest_start:manifest_start + manifest_length])
+        self.data_start = align(manifest_start + manifest_length)
+        self.view = memoryview(self.data)
+
+    def blob(self, offset, length):
+        start = self.data_start + offset
+        return self.view[start:start + length]
+
+    def surface(self, offset, size):
+        """A display-format Surface copied from the RGBA pixels at `offset`."""
+        pixels = self.blob(offset, size[0] * size[1] * 4)
+        return pg.image.frombuffer(pixels, size, 'RGBA').convert_alpha()
+
+    def list_images(self, key):
+        return self.manifest['dirs'].get(key)
+
+    def image(self, key):
+        """(Surface, mip level Surfaces or None) at native size, or None if not packed."""
+        entry = self.manifest['images'].get(key)
+        if entry is None:
+            return None
+        image = self.surface(entry['offset'], entry['size'])
+        mips = entry.get('mips')
+        if mips is not None:
+            mips = [self.surface(offset, (width, height)) for width, height, offset in mips]
+        return image, mips
+
+    def scaled(self, key, size):
+        entry = self.manifest['images'].get(key)
+        offset = entry and entry['scaled'].get(f'{size[0]}x{size[1]}')
+        if offset is None:
+            return None
+        return self.surface(offset, size)
+
+    def sound(self, key):
+        entry = self.manifest['sounds'].get(key)
+        if entry is None:
+            return None
+        return self.blob(*entry)
+
+
+class PackWriter:
+    """Write side: collects blobs and the manifest, then writes the pack in one go."""
+
+    def __init__(self):
+        self.blobs = []
+        self.size = 0
+        self.manifest = {'version': VERSION, 'dirs': {}, 'images': {}, 'sounds': {}}
+
+    def add(self, data):
+        offset = self.size
+        self.blobs.append(data)
+        self.size = align(offset + len(data))
+        return offset
+
+    def add_surface(self, surface):
+        return self.add(pg.image.tobytes(surface, 'RGBA'))
+
+    def write(self, path):
+        manifest = json.dumps(self.manifest, separators=(',', ':')).encode()
+        data_start = align(HEADER.size + len(manifest))
+        with open(path, 'wb') as f:
+            f.write(HEADER.pack(MAGIC, VERSION, len(manifest)))
+            f.write(manifest)
+            f.write(b'\0' * (data_start - f.tell()))
+            for blob in self.blobs:
+                f.write(blob)
+                f.write(b'\0' * (align(len(blob)) - len(blob)))
+
+
+def bake(path=None):
+    """Pack resources/ for the current settings; returns the pack path."""
+    os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+    os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+    import assets
+    from main import Game
+
+    path = path or resource_path('resources', ASSET_PACK)
+    root = assets.resolve(resource_path('resources'))
+    # start a game from the loose files, recording which scaled textures it loads
+    assets.use_pack(None)
+    Game(headless=True)
+    assets.load_all()
+    scaled = sorted(assets.scaled_requests)
+
+    writer = PackWriter()
+    manifest = writer.manifest
+    for directory, dir_names, file_names in os.walk(root):
+        dir_names.sort()
+        key = pack_key(directory, root)
+        images = assets.list_images(directory)
+        if images:
+            manifest['dirs'][key] = images
+        for file_name in sorted(file_names):
+            file_path = os.path.join(directory, file_name)
+            file_key = pack_key(file_path, root)
+            if file_name in images:
+                image = assets.load_image(file_path)
+                entry = manifest['images'][file_key] = {
+                    'size': list(image.get_size()),
+                    'offset': writer.add_surface(image),
+                    'scaled': {},
+                }
+                if file_key.startswith('sprites/'):
+                    entry['mips'] = [[*level.get_size(), writer.add_surface(level)]
+                                     for level in assets.get_mips(image).levels[1:]]
+            elif file_name.lower().endswith(SOUND_EXTENSIONS):
+                with open(file_path, 'rb') as f:
+                    data = f.read()
+                manifest['sounds'][file_key] = [writer.add(data), len(data)]
+
+    for image_path, size in scaled:
+        entry = manifest['images'].get(pack_key(image_path, root))
+        if entry is not None:
+            entry['scaled'][f'{size[0]}x{size[1]}'] = writer.add_surface(assets.load_scaled(image_path, size))
+
+    writer.write(path)
+    return path
+
+
+if __name__ == '__main__':
+    pack_path = bake()
+    print(f'asset pack written to {pack_path} ({os.path.getsize(pack_path) / 2 ** 20:.1f} MB)')
@@ -0,0 +1,363 @@
+# assets.py
+import io
+import os
+import math
+import queue
+import threading
+import pygame as pg
+from settings import (ASSET_PACK, SPRITE_MIP_STEPS, SPRITE_MIP_MAX_HEIGHT, SPRITE_MIP_CACHE_SIZE,
+                      SPRITE_MIP_CACHE_BYTES)
+from asset_pack import AssetPack, pack_key
+from utils.lru import LRUCache
+from utils.resource_path import resource_path
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg')
+
+# process-wide caches keyed by resolved path, shared by every sprite, NPC and new_game
+_images = {}
+_frames = {}
+# id(Surface) -> MipChain (the chain keeps its Surface alive, so ids are not reused)
+_mips = {}
+# (MipChain, size step, aspect ratio) -> Surface at that projected size, weighed in RGBA bytes
+_scaled = LRUCache(SPRITE_MIP_CACHE_SIZE, maxweight=SPRITE_MIP_CACHE_BYTES,
+                   weigh=lambda image: image.get_width() * image.get_height() * 4)
+# every (resolved path, size) passed to load_scaled, for asset_pack.bake
+scaled_requests = set()
+
+# the baked pack (asset_pack.py) when one exists, opened on first use; None = loose files
+_pack = None
+_pack_root = None
+_pack_opened = False
+
+# lazily loaded assets by name (see lazy) and the background loader prefetching them
+_handles = {}
+_prefetch_queue = queue.Queue()
+# guards AssetHandle.queued, so a handle is on the queue at most once
+_prefetch_lock = threading.Lock()
+_loader_thread = None
+# False: prefetch loads on the calling thread instead (see set_background_loading)
+_background_loading = True
+_placeholder = None
+
+
+def resolve(path):
+    return os.path.normcase(os.path.realpath(path))
+
+
+def use_pack(pack_path):
+    """Load from the pack at `pack_path` from now on, or from the loose files if None."""
+    global _pack, _pack_root, _pack_opened
+    _pack_opened = True
+    _pack = AssetPack(pack_path) if pack_path else None
+    _pack_root = resolve(resource_path('resources'))
+
+
+def get_pack():
+    """The AssetPack at resources/ASSET_PACK if it exists (an unreadable pack is skipped)."""
+    if not _pack_opened:
+        pack_path = resource_path('resources', ASSET_PACK) if ASSET_PACK else None
+        try:
+            use_pack(pack_path if pack_path and os.path.isfile(pack_path) else None)
+        except (OSError, ValueError) as e:
+            print(f"[assets] ignoring asset pack {pack_path}: {e}")
+            use_pack(None)
+    return _pack
+
+
+def list_images(path):
+    """Sorted names of the image files in directory `path`."""
+    pack = get_pack()
+    if pack is not None:
+        names = pack.list_images(pack_key(resolve(path), _pack_root))
+        if names is not None:
+            return list(names)
+    return sorted(f for f in os.listdir(path)
+                  if f.lower().endswith(IMAGE_EXTENSIONS) and os.path.isfile(os.path.join(path, f)))
+
+
+def load_image(path):
+    """Return the converted Surface for `path`, decoding the file only once per process."""
+    key = resolve(path)
+    image = _images.get(key)
+    if image is None:
+        pack = get_pack()
+        packed = pack and pack.image(pack_key(key, _pack_root))
+        if packed:
+            image, mips = packed
+            if mips is not None:
+                _mips[id(image)] = MipChain(image, mips)
+        else:
+            image = pg.image.load(key).convert_alpha()
+        _images[key] = image
+    return image
+
+
+def load_scaled(path, size):
+    """The image at `path` scaled to `size` (width, height), from the pack when baked there."""
+    key = resolve(path)
+    size = tuple(size)
+    scaled_requests.add((key, size))
+    image = _images.get((key, size))
+    if image is None:
+        pack = get_pack()
+        image = pack and pack.scaled(pack_key(key, _pack_root), size)
+        if image is None:
+            image = pg.transform.scale(load_image(path), size)
+        _images[(key, size)] = image
+    return image
+
+
+def load_sound(path):
+    """A pg.mixer.Sound for the file at `path`, read from the pack when baked there."""
+    pack = get_pack()
+    data = pack and pack.sound(pack_key(resolve(path), _pack_root))
+    if data is None:
+        return pg.mixer.Sound(path)
+    return pg.mixer.Sound(file=io.BytesIO(data))
+
+
+def load_frames(path):
+    """
+    Return a tuple with a Surface for every image in directory `path`, sorted by name.
+    Each folder is decoded once per process, with a mip chain per frame;
+    files that fail to load are skipped.
+    """
+    key = resolve(path)
+    frames = _frames.get(key)
+    if frames is None:
+        loaded = []
+        for file_name in list_images(key):
+            file_path = os.path.join(key, file_name)
+            try:
+                loaded.append(load_image(file_path))
+                get_mips(loaded[-1])
+            except Exception as e:
+                print(f"[assets] failed to load image {file_path}: {e}")
+        frames = _frames[key] = tuple(loaded)
+        if frames:
+            print(f"[assets] Loaded {len(frames)} frames from: {path}")
+    return frames
+
+
+def get_mips(image):
+    """The shared MipChain of a sprite frame, built on first request."""
+    chain = _mips.get(id(image))
+    if chain is None:
+        chain = _mips[id(image)] = MipChain(image)
+    return chain
+
+
+def lazy(name, loader):
+    """The shared AssetHandle called `name`, created with `loader` on first request."""
+    handle = _handles.get(name)
+    if handle is None:
+        handle = _handles[name] = AssetHandle(name, loader)
+    return handle
+
+
+def set_background_loading(enabled):
+    """
+    With `enabled` False, prefetch (and get_nowait) load on the calling thread right away.
+    Headless runs use this so what is loaded when never depends on thread timing.
+    """
+    global _background_loading
+    _background_loading = enabled
+
+
+def prefetch(*handles):
+    """Queue handles for the background loader thread; loaded or already queued ones are skipped."""
+    global _loader_thread
+    if not _background_loading:
+        for handle in handles:
+            handle.get()
+        return
+    if _loader_thread is None:
+        _loader_thread = threading.Thread(target=_load_in_background, name='asset-loader', daemon=True)
+        _loader_thread.start()
+    with _prefetch_lock:
+        for handle in handles:
+            if not handle.loaded and not handle.queued:
+                handle.queued = True
+                _prefetch_queue.put(handle)
+
+
+def load_all():
+    """Load every lazy handle created so far on this thread (asset_pack.bake needs them all)."""
+    for handle in list(_handles.values()):
+        handle.get()
+
+
+def pending():
+    """Number of prefetched handles the loader thread has not finished yet."""
+    return _prefetch_queue.unfinished_tasks
+
+
+def wait_for_prefetch():
+    """Block until the loader thread has worked through its queue."""
+    _prefetch_queue.join()
+
+
+def _load_in_background():
+    while True:
+        handle = _prefetch_queue.get()
+        try:
+            handle.get()
+        except Exception as e:
+            # get() on the main thread retries and raises
+            print(f"[assets] background load of {handle.name} failed: {e}")
+        finally:
+            with _prefetch_lock:
+                handle.queued = False
+            _prefetch_queue.task_done()
+
+
+def placeholder():
+    """Stand-in Surface for an image that is still loading (a small transparent square)."""
+    global _placeholder
+    if _placeholder is None:
+        _placeholder = pg.Surface((1, 1), pg.SRCALPHA)
+    return _placeholder
+
+
+def clear_cache():
+    """Drop every cached Surface (the next load decodes from disk again)."""
+    _images.clear()
+    _frames.clear()
+    _mips.clear()
+    _scaled.clear()
+    _handles.clear()
+
+
+class AssetHandle:
+    """
+    An asset that is loaded on first use rather than at startup. get() loads it on
+    the calling thread if needed (waiting for the loader thread if it is already
+    on it); get_nowait() never blocks and returns a fallback until it is ready.
+    """
+    __slots__ = ('name', 'loader', 'value', 'loaded', 'queued', 'lock')
+
+    def __init__(self, name, loader):
+        self.name = name
+        self.loader = loader
+        self.value = None
+        self.loaded = False
+        # on the loader thread's queue (set and cleared under _prefetch_lock)
+        self.queued = False
+        self.lock = threading.Lock()
+
+    def ready(self):
+        return self.loaded
+
+    def get(self):
+        if not self.loaded:
+            with self.lock:
+                if not self.loaded:
+                    self.value = self.loader()
+                    self.loaded = True
+        return self.value
+
+    def get_nowait(self, fallback=None):
+        """The asset if loaded, else `fallback` (placeholder() if None) with the load queued."""
+        if self.loaded:
+            return self.value
+        prefetch(self)
+        if self.loaded:
+            return self.value
+        return placeholder() if fallback is None else fallback
+
+
+class MipChain:
+    """
+    Pre-scaled copies of one sprite frame for SpriteObject.get_sprite_projection.
+    Power-of-two levels are filtered down from the full image once; projected heights
+    are snapped to SPRITE_MIP_STEPS sizes per octave, built from the nearest larger
+    level on first use and then reused from a shared LRU, so a sprite only costs a
+    scale when it reaches a size it has not been drawn at recently.
+    """
+    __slots__ = ('image', 'levels')
+
+    def __init__(self, image, levels=None):
+        self.image = image
+        # levels below full size, when already baked into the asset pack
+        if levels is not None:
+            self.levels = [image, *levels]
+            return
+        self.levels = [image]
+        level = image
+        while level.get_width() >= 2 and level.get_height() >= 2:
+            level = pg.transform.smoothscale(level, (level.get_width() // 2, level.get_height() // 2))
+            self.levels.append(level)
+
+    def get(self, height, ratio):
+        """The frame about `height` px tall and `ratio` * height wide (within half a size step)."""
+        if height > SPRITE_MIP_MAX_HEIGHT:
+            # fills most of the screen: too large to keep around, scale exactly
+            return pg.transform.scale(self.image, (int(height * ratio), int(height)))
+
+        step = round(math.log2(max(height, 1)) * SPRITE_MIP_STEPS)
+        key = (self, step, ratio)
+        image = _scaled.get(key)
+        if image is None:
+            height = 2 ** (step / SPRITE_MIP_STEPS)
+            size = (max(1, int(height * ratio)), max(1, int(height)))
+            # smallest level still at least as large, so the final pass only shrinks it
+            source = self.levels[0]
+            for level in self.levels:
+                if level.get_width() < size[0] or level.get_height() < size[1]:
+                    break
+                source = level
+            if source.get_width() >= size[0] and source.get_height() >= size[1]:
+                image = pg.transform.smoothscale(source, size)
+            else:
+                image = pg.transform.scale(source, size)
+            _scaled.put(key, image)
+        return image
+
+
+class FrameCursor:
+    """
+    Per-instance position in a shared tuple of animation frames.
+    Supports the deque calls the sprites use (rotate, [i], len, iteration)
+    so many instances can animate the same frames without copying them.
+    """
+    __slots__ = ('frames', 'index')
+
+    def __init__(self, frames=()):
+        self.frames = tuple(frames)
+        self.index = 0
+
+    def rotate(self, n=1):
+        if self.frames:
+            self.index = (self.index - n) % len(self.frames)
+
+    def __getitem__(self, i):
+        if not self.frames:
+            raise IndexError('no frames to animate')
+        return self.frames[(self.index + i) % len(self.frames)]
+
+    def __len__(self):
+        return len(self.frames)
+
+    def __iter__(self):
+        for i in range(len(self.frames)):
+            yield self[i]
+
+
+class LazyFrameCursor(FrameCursor):
+    """
+    FrameCursor over frames behind an AssetHandle. Until the loader has them it
+    animates `fallback` (for example the sprite's current frames) instead of blocking.
+    """
+    __slots__ = ('handle', 'fallback')
+
+    def __init__(self, handle, fallback=()):
+        self.handle = handle
+        self.fallback = tuple(fallback)
+        self.index = 0
+
+    @property
+    def frames(self):
+        return self.handle.get_nowait(self.fallback)
+
+    def ready(self):
+        return self.handle.ready()
@@ -0,0 +1,376 @@
+# benchmarks/bench.py
+"""
+Headless benchmark suite for the raycaster, renderer, pathfinding, object update, startup and
+streamed maps.
+
+    python benchmarks/bench.py                       # run everything, compare with baseline.json
+    python benchmarks/bench.py --only raycast,startup
+    python benchmarks/bench.py --save-baseline       # store this run as the new baseline
+
+Every case runs in its own subprocess (resolution and ray count are fixed when settings
+is imported) and reports the median milliseconds per call. Results are written to
+benchmarks/results.json; a case slower than baseline * (1 + tolerance) is a regression
+and makes the script exit with status 1.
+"""
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import contextlib
+import statistics
+import subprocess
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(BENCH_DIR)
+RESULTS_PATH = os.path.join(BENCH_DIR, 'results.json')
+BASELINE_PATH = os.path.join(BENCH_DIR, 'baseline.json')
+
+# (case, extra environment) pairs; each one runs in a fresh interpreter
+RAYCAST_CONFIGS = [('800x450', 400), ('1280x720', 640), ('1600x900', 800), ('1600x900', 1600)]
+JOBS = (
+    [('raycast', {'DOOM_RES': res, 'DOOM_NUM_RAYS': str(rays)}) for res, rays in RAYCAST_CONFIGS]
+    + [('pathfinding', {})]
+    + [('objects', {'DOOM_NPC_BACKEND': backend}) for backend in ('objects', 'arrays')]
+    + [('entities', {}), ('startup', {}), ('map', {})]
+)
+
+
+def timed(func, repeat, warmup=3):
+    """Median and min milliseconds per call of func() over `repeat` runs."""
+    for _ in range(warmup):
+        func()
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - start) * 1000)
+    return {'median_ms': statistics.median(samples), 'min_ms': min(samples), 'runs': repeat}
+
+
+def make_game(map_path=None):
+    from main import Game
+    # the game logs spawns and asset loads; keep the worker's stdout for results
+    with contextlib.redirect_stdout(open(os.devnull, 'w')):
+        game = Game(headless=True, seed=0, map_path=map_path)
+    game.player.health = 10 ** 9
+    return game
+
+
+# ------------------- cases (run inside a worker) -------------------
+
+def bench_raycast():
+    from settings import RES, NUM_RAYS
+    game = make_game()
+    raycasting = game.raycasting
+    player = game.player
+    player.x, player.y, player.angle = 3.37, 6.41, 0.3
+    tag = f'{RES[0]}x{RES[1]},rays={NUM_RAYS}'
+
+    def turn():
+        player.angle += 0.01
+
+    results = {}
+    engines = ['python'] + (['numpy'] if raycasting.engine == 'numpy' else [])
+    for engine in engines:
+        ray_cast = getattr(raycasting, f'ray_cast_{engine}')
+        results[f'raycast.ray_cast.{engine}[{tag}]'] = timed(lambda: (turn(), ray_cast()), 30)
+
+    raycasting.ray_cast()
+    results[f'raycast.get_objects_to_render[{tag}]'] = timed(
+        lambda: (turn(), raycasting.ray_cast(), raycasting.get_objects_to_render()), 30)
+    results[f'render.frame[{tag}]'] = timed(lambda: (turn(), game.render()), 30)
+    return results
+
+
+def make_grid(size, wall_ratio=0.2, seed=0):
+    """size x size map with a solid border and randomly scattered interior walls."""
+    rng = random.Random(seed)
+    grid = [[1 if x in (0, size - 1) or y in (0, size - 1) or rng.random() < wall_ratio else False
+             for x in range(size)] for y in range(size)]
+    grid[1][1] = grid[size - 2][size - 2] = False
+    return grid
+
+
+def bench_pathfinding():
+    from types import SimpleNamespace
+    from map import Map
+    from pathfinding import PathFinding
+
+    results = {}
+    for size in (16, 32, 64, 128, 256):
+        game = SimpleNamespace(object_handler=SimpleNamespace(npc_positions=set()),
+                               player=SimpleNamespace(map_pos=(1, 1)))
+        game.map = Map(game, mini_map=make_grid(size))
+        pathfinding = PathFinding(game)
+        start, goal = (1, 1), (size - 2, size - 2)
+        repeat = 20 if size <= 64 else 5
+        results[f'pathfinding.bfs[{size}x{size}]'] = timed(
+            lambda: pathfinding.bfs(start, goal, pathfinding.graph), repeat)
+        results[f'pathfinding.astar[{size}x{size}]'] = timed(
+            lambda: pathfinding.astar(start, goal, pathfinding.graph), repeat)
+        results[f'pathfinding.flow_field[{size}x{size}]'] = timed(
+            lambda: pathfinding.get_flow_field(goal), repeat)
+    return results
+
+
+def bench_objects():
+    from settings import NPC_BACKEND
+
+    results = {}
+    for count in (10, 100, 1000):
+        for engaged in (True, False):
+            game = make_game()
+            handler = game.object_handler
+            handler.enemies = count
+            with contextlib.redirect_stdout(open(os.devnull, 'w')):
+                handler.reset()
+            if engaged:
+                # every NPC chasing the player (worst case); idle ones think on the AI_LOD schedule
+                for npc in handler.npc_list:
+                    npc.player_search_trigger = True
+                handler.engaged_npcs.update(handler.npc_list)
+            game.raycasting.update()
+
+            def frame():
+                game.sim_time += game.delta_time
+                handler.update()
+
+            state = '' if engaged else '.idle'
+            results[f'objects.update.{NPC_BACKEND}{state}[npcs={count}]'] = timed(frame, 20 if count < 1000 else 5)
+    return results
+
+
+def unslotted_copy(module_name, **stand_ins):
+    """
+    A fresh copy of module `module_name` with every __slots__ dropped, so its instances
+    keep their attributes in a __dict__: the baseline bench_entities compares against.
+    `stand_ins` replace the modules of those names while the copy imports from them.
+    """
+    import ast
+    import types
+    import importlib
+    path = importlib.import_module(module_name).__file__
+    with open(path) as f:
+        tree = ast.parse(f.read())
+    for node in ast.walk(tree):
+        if isinstance(node, ast.ClassDef):
+            node.body = [stmt for stmt in node.body
+                         if not (isinstance(stmt, ast.Assign)
+                                 and any(getattr(target, 'id', None) == '__slots__' for target in stmt.targets))]
+            node.body = node.body or [ast.Pass()]
+    module = types.ModuleType(module_name)
+    module.__file__ = path
+    originals = {name: sys.modules[name] for name in stand_ins}
+    sys.modules.update(stand_ins)
+    try:
+        exec(compile(tree, path, 'exec'), module.__dict__)
+    finally:
+        sys.modules.update(originals)
+    return module
+
+
+def bench_entities():
+    """
+    Memory per entity and the per-NPC update path (no pathfinding, no drawing) at thousands
+    of NPCs, each next to the same classes without __slots__ (under 'unslotted').
+    """
+    import tracemalloc
+    import sprite_object
+    import npc
+    game = make_game()
+    handler = game.object_handler
+    free = [(x + 0.5, y + 0.5) for y in range(game.map.rows) for x in range(game.map.cols)
+            if not game.map.is_wall(x, y)]
+    count = 2000
+    unslotted_sprites = unslotted_copy('sprite_object')
+    unslotted_npcs = unslotted_copy('npc', sprite_object=unslotted_sprites)
+
+    def measure(sprites, npcs):
+        npc_types = [getattr(npcs, cls.__name__) for cls in handler.npc_types]
+
+        def spawn_npcs():
+            return [npc_types[i % 3](game, pos=free[i % len(free)]) for i in range(count)]
+
+        def spawn_sprites():
+            return [sprites.AnimatedSprite(game, pos=free[i % len(free)]) for i in range(count)]
+
+        results = {}
+        for name, spawn in (('npc', spawn_npcs), ('sprite', spawn_sprites)):
+            spawn()  # decode the frames first, so only the entities themselves are measured
+            tracemalloc.start()
+            entities = spawn()
+            size = tracemalloc.get_traced_memory()[0]
+            tracemalloc.stop()
+            results[f'entities.spawn.{name}[n={count}]'] = {**timed(spawn, 5, warmup=1),
+                                                            'bytes_per_entity': size / count}
+
+        live_npcs = spawn_npcs()
+
+        def update():
+            game.sim_time += game.delta_time
+            for entity in live_npcs:
+                entity.update()
+
+        results[f'entities.update.npc[n={count}]'] = timed(update, 20)
+        results[f'entities.update.sprite[n={count}]'] = timed(lambda: [sprite.update() for sprite in entities], 20)
+        return results
+
+    results = measure(sprite_object, npc)
+    for name, result in measure(unslotted_sprites, unslotted_npcs).items():
+        results[name]['unslotted'] = result
+    return results
+
+
+def bench_startup():
+    import assets
+    from settings import ASSET_PACK
+    from utils.resource_path import resource_path
+    game = make_game()
+    pack_path = resource_path('resources', ASSET_PACK)
+    results = {}
+    with contextlib.redirect_stdout(open(os.devnull, 'w')):
+        assets.use_pack(None)
+        results['startup.new_game.cold'] = timed(lambda: (assets.clear_cache(), game.new_game()), 3, warmup=1)
+        if os.path.isfile(pack_path):
+            assets.use_pack(pack_path)
+            results['startup.new_game.cold_pack'] = timed(lambda: (assets.clear_cache(), game.new_game()), 3,
+                                                          warmup=1)
+        results['startup.new_game.warm'] = timed(game.new_game, 3, warmup=1)
+        results['startup.reset_level'] = timed(game.reset_level, 10, warmup=1)
+    return results
+
+
+def bench_map():
+    """Streamed maps: new_game and one window move should not grow with the map's area."""
+    import tempfile
+    import map_file
+    from settings import MAP_CHUNK_RADIUS
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        for size in (256, 1024, 4096):
+            path = os.path.join(directory, f'{size}.map')
+            map_file.generate(path, size, size)
+            game = make_game(path)
+            # back and forth between two neighbouring window positions (one StreamingMap.update move)
+            centers = [(4, 4), (5, 4)]
+
+            def page(cold=False):
+                centers.reverse()
+                links = game.pathfinding.chunk_links
+                if cold:
+                    # as if the player got there faster than MAP_PREPARE_CHUNKS could keep up
+                    for key in [key for key in links if key not in game.map.chunks]:
+                        del links[key]
+                else:
+                    for key in game.map.chunks_around(centers[0], MAP_CHUNK_RADIUS):
+                        game.pathfinding.get_chunk_links(key)
+                game.map.page(centers[0])
+
+            with contextlib.redirect_stdout(open(os.devnull, 'w')):
+                results[f'map.new_game[{size}x{size}]'] = timed(game.new_game, 5, warmup=1)
+                results[f'map.page[{size}x{size}]'] = timed(page, 10)
+                results[f'map.page.cold[{size}x{size}]'] = timed(lambda: page(cold=True), 10)
+    return results
+
+
+CASES = {
+    'raycast': bench_raycast,
+    'pathfinding': bench_pathfinding,
+    'objects': bench_objects,
+    'entities': bench_entities,
+    'startup': bench_startup,
+    'map': bench_map,
+}
+
+
+# ------------------- driver -------------------
+
+def run_worker(case):
+    sys.path.insert(0, ROOT)
+    results = CASES[case]()
+    print(json.dumps(results))
+
+
+def run_job(case, env):
+    print(f'running {case} {" ".join(f"{k}={v}" for k, v in env.items())}'.rstrip(), flush=True)
+    proc = subprocess.run([sys.executable, os.path.abspath(__file__), '--worker', case],
+                          env={**os.environ, **env}, capture_output=True, text=True)
+    if proc.returncode != 0:
+        print(proc.stderr, file=sys.stderr)
+        raise SystemExit(f'benchmark case {case!r} failed')
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def memory(result):
+    size = result.get('bytes_per_entity')
+    text = '' if size is None else f'   {size:.0f} B/entity'
+    unslotted = result.get('unslotted')
+    if unslotted:
+        # bench_entities: the same case without __slots__
+        text += f'   vs __dict__: {result["median_ms"] / unslotted["median_ms"] - 1:+.1%} time'
+        if size is not None:
+            text += f', {size / unslotted["bytes_per_entity"] - 1:+.1%} memory ({unslotted["bytes_per_entity"]:.0f} B)'
+    return text
+
+
+def compare(results, baseline, tolerance):
+    """Print a results table against the baseline; returns the names of regressed cases."""
+    regressions = []
+    for name, result in results.items():
+        current = result['median_ms']
+        base = baseline.get(name, {}).get('median_ms')
+        if base is None:
+            print(f'{name:<52}{current:10.3f} ms   (no baseline){memory(result)}')
+            continue
+        change = current / base - 1 if base else 0.0
+        flag = ''
+        if change > tolerance:
+            flag = '  REGRESSION'
+            regressions.append(name)
+        print(f'{name:<52}{current:10.3f} ms   {change:+7.1%} vs {base:.3f}{flag}{memory(result)}')
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--only', default='', help='comma-separated cases: ' + ', '.join(CASES))
+    parser.add_argument('--output', default=RESULTS_PATH, help='where to write the results JSON')
+    parser.add_argument('--baseline', default=BASELINE_PATH, help='baseline JSON to compare against')
+    parser.add_argument('--save-baseline', action='store_true', help='write this run to the baseline file')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='allowed slowdown before failing (0.25 = 25%%)')
+    parser.add_argument('--worker', choices=CASES, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        run_worker(args.worker)
+        return
+
+    only = {case for case in args.only.split(',') if case}
+    results = {}
+    for case, env in JOBS:
+        if not only or case in only:
+            results.update(run_job(case, env))
+
+    with open(args.output, 'w') as f:
+        json.dump(results, f, indent=2, sort_keys=True)
+    print(f'results written to {args.output}\n')
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    regressions = compare(results, baseline, args.tolerance)
+
+    if args.save_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump({**baseline, **results}, f, indent=2, sort_keys=True)
+        print(f'\nbaseline saved to {args.baseline}')
+    elif regressions:
+        print(f'\n{len(regressions)} regression(s) over {args.tolerance:.0%}')
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+# game_input.py
+import pygame as pg
+from settings import HALF_WIDTH, HALF_HEIGHT
+
+
+class LiveInput:
+    """Reads the real keyboard, mouse and event queue through pygame."""
+
+    def next_frame(self):
+        pass
+
+    def get_events(self):
+        return pg.event.get()
+
+    def get_pressed(self):
+        return pg.key.get_pressed()
+
+    def get_mouse_pos(self):
+        return pg.mouse.get_pos()
+
+    def get_mouse_rel(self):
+        return pg.mouse.get_rel()
+
+    def set_mouse_pos(self, pos):
+        pg.mouse.set_pos(pos)
+
+
+class KeyState:
+    """Stand-in for pg.key.get_pressed(): keys[pg.K_w] is True while K_w is held."""
+
+    def __init__(self, held=()):
+        self.held = frozenset(held)
+
+    def __getitem__(self, key):
+        return key in self.held
+
+
+class ScriptedInput:
+    """
+    Replays a list of per-frame inputs, looping when it runs out. Each frame is a dict with
+    optional 'keys' (pygame key codes held), 'rel' (mouse x, y motion) and 'fire' (shoot).
+    The real event queue is pumped but ignored, so runs do not depend on the machine.
+    """
+
+    def __init__(self, script=()):
+        self.script = list(script) or [{}]
+        self.frame = -1
+        self.current = {}
+
+    def next_frame(self):
+        self.frame += 1
+        self.current = self.script[self.frame % len(self.script)]
+
+    def get_events(self):
+        pg.event.pump()
+        if self.current.get('fire'):
+            return [pg.event.Event(pg.MOUSEBUTTONDOWN, button=1, pos=(HALF_WIDTH, HALF_HEIGHT))]
+        return []
+
+    def get_pressed(self):
+        return KeyState(self.current.get('keys', ()))
+
+    def get_mouse_pos(self):
+        return HALF_WIDTH, HALF_HEIGHT
+
+    def get_mouse_rel(self):
+        return self.current.get('rel', (0, 0))
+
+    def set_mouse_pos(self, pos):
+        pass
+
+
+def patrol_script(length=600):
+    """Walk forward while sweeping the view left and right, firing twice a second."""
+    script = []
+    for frame in range(length):
+        turn = 8 if (frame // 120) % 2 == 0 else -8
+        script.append({
+            'keys': (pg.K_w,) if frame % 240 < 200 else (pg.K_a,),
+            'rel': (turn, 0),
+            'fire': frame % 30 == 0,
+        })
+    return script
@@ -0,0 +1,75 @@
+# line_of_sight.py
+from settings import MAX_DEPTH
+
+# numpy is optional: ObjectHandler falls back to NPC.ray_cast_player_npc without it
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+def march_to_target(grid, x, y, dx, dy, depth, delta_depth, target_x, target_y):
+    """
+    Step every ray MAX_DEPTH times along its grid lines. Returns (target_dist, wall_dist)
+    per ray: the depth at which the target tile or a wall is reached first, 0 otherwise.
+    """
+    rows, cols = grid.shape
+    steps = np.arange(MAX_DEPTH)
+    tile_x = (x[:, None] + steps * dx[:, None]).astype(np.intp)
+    tile_y = (y[:, None] + steps * dy[:, None]).astype(np.intp)
+
+    is_target = (tile_x == target_x[:, None]) & (tile_y == target_y[:, None])
+    inside = (tile_x >= 0) & (tile_x < cols) & (tile_y >= 0) & (tile_y < rows)
+    is_wall = np.zeros(tile_x.shape, dtype=bool)
+    is_wall[inside] = grid[tile_y[inside], tile_x[inside]] != 0
+
+    stop = is_target | is_wall
+    hit = stop.any(axis=1)
+    first = stop.argmax(axis=1)
+    hit_depth = depth + first * delta_depth
+    hit_target = hit & is_target[np.arange(len(first)), first]
+    return np.where(hit_target, hit_depth, 0.0), np.where(hit & ~hit_target, hit_depth, 0.0)
+
+
+def player_sees_npcs(grid, player_pos, npc_x, npc_y):
+    """
+    Vectorized NPC.ray_cast_player_npc for many NPCs at once.
+    npc_x/npc_y are float arrays of NPC positions; returns a bool array.
+    """
+    ox, oy = player_pos
+    x_map, y_map = int(ox), int(oy)
+    target_x = npc_x.astype(np.intp)
+    target_y = npc_y.astype(np.intp)
+
+    ray_angle = np.arctan2(npc_y - oy, npc_x - ox)
+    sin_a = np.sin(ray_angle)
+    cos_a = np.cos(ray_angle)
+    up = sin_a > 0
+    right = cos_a > 0
+
+    # rays parallel to a grid axis give inf/nan and simply never hit on that axis
+    with np.errstate(divide='ignore', invalid='ignore'):
+        # horizontals
+        y_hor = np.where(up, y_map + 1, y_map - 1e-6)
+        dy = np.where(up, 1.0, -1.0)
+        depth_hor = (y_hor - oy) / sin_a
+        x_hor = ox + depth_hor * cos_a
+        delta_depth = dy / sin_a
+        dx = delta_depth * cos_a
+        player_dist_h, wall_dist_h = march_to_target(grid, x_hor, y_hor, dx, dy, depth_hor, delta_depth,
+                                                     target_x, target_y)
+
+        # verticals
+        x_vert = np.where(right, x_map + 1, x_map - 1e-6)
+        dx = np.where(right, 1.0, -1.0)
+        depth_vert = (x_vert - ox) / cos_a
+        y_vert = oy + depth_vert * sin_a
+        delta_depth = dx / cos_a
+        dy = delta_depth * sin_a
+        player_dist_v, wall_dist_v = march_to_target(grid, x_vert, y_vert, dx, dy, depth_vert, delta_depth,
+                                                     target_x, target_y)
+
+    player_dist = np.maximum(player_dist_v, player_dist_h)
+    wall_dist = np.maximum(wall_dist_v, wall_dist_h)
+    same_tile = (target_x == x_map) & (target_y == y_map)
+    return same_tile | ((0 < player_dist) & (player_dist < wall_dist)) | (wall_dist == 0)
@@ -1,9 +1,14 @@
 # main.py
+import os
 import sys
+import time
+import random
+import argparse
 import pygame as pg
 
 from settings import *
-from map import Map
+import assets
+from map import Map, StreamingMap
 from player import Player
 from raycasting import RayCasting
 from object_render import ObjectRenderer
@@ -11,6 +16,9 @@ from object_handler import ObjectHandler
 from weapon import Weapon
 from sound import Sound
 from pathfinding import PathFinding
+from game_input import LiveInput, ScriptedInput, patrol_script
+from profiler import FrameProfiler
+from resolution import ResolutionScaler
 
 # optional: helper for nicer error messages
 try:
@@ -22,16 +30,53 @@ except Exception:
 
 
 class Game:
-    def __init__(self):
+    def __init__(self, headless=False, seed=None, input_script=None, profile_path=None,
+                 dynamic_resolution=DYNAMIC_RESOLUTION, map_path=MAP_FILE):
+        """
+        headless: no window or audio device; render into an off-screen Surface, run exactly
+                  one simulation step per frame and read input from `input_script`
+                  (see game_input.ScriptedInput). With `seed` runs are repeatable.
+        profile_path: write per-frame stage timings there (.csv or .json) on exit.
+        dynamic_resolution: trade ray count for frame time (see resolution.ResolutionScaler).
+        map_path: stream the level from this map file (see map.StreamingMap) instead of
+                  using the built-in map.
+        """
+        self.headless = headless
+        self.map_path = map_path
+        self.profiler = FrameProfiler()
+        self.profiler.show_overlay = PROFILER_OVERLAY
+        self.profile_path = profile_path
+        if seed is not None:
+            random.seed(seed)
+        if headless:
+            os.environ['SDL_VIDEODRIVER'] = 'dummy'
+            os.environ['SDL_AUDIODRIVER'] = 'dummy'
+        # headless runs load lazily loaded assets synchronously, so seeded runs repeat exactly
+        assets.set_background_loading(not headless)
         pg.init()
-        pg.mouse.set_visible(False)
-        self.screen = pg.display.set_mode(RES)
-        pg.event.set_grab(True)
+        if headless:
+            # convert()/convert_alpha() still need a display mode to exist
+            pg.display.set_mode((1, 1))
+            self.screen = pg.Surface(RES)
+            self.input = ScriptedInput(input_script or ())
+        else:
+            pg.mouse.set_visible(False)
+            self.screen = pg.display.set_mode(RES)
+            pg.event.set_grab(True)
+            self.input = LiveInput()
+        self.profiler_key = pg.key.key_code(PROFILER_KEY)
         self.clock = pg.time.Clock()
-        self.delta_time = 1
+        # the simulation always advances in fixed SIMULATION_STEP ms steps
+        self.delta_time = SIMULATION_STEP
+        # simulated milliseconds since start, the clock for animations and timers
+        self.sim_time = 0
+        # raised on the simulation step that crosses each global_event_time boundary
         self.global_trigger = False
-        self.global_event = pg.USEREVENT + 0
-        pg.time.set_timer(self.global_event, 40)
+        self.global_event_time = 40
+        self.next_global_event = self.global_event_time
+        # set by restart(); the round is reset once the current simulation step ends
+        self.restart_pending = False
+        self.resolution = ResolutionScaler(self, enabled=dynamic_resolution)
 
         # Initialize game subsystems with guarded startup
         try:
@@ -48,7 +93,7 @@ class Game:
 
     def new_game(self):
         # Create lightweight parts first
-        self.map = Map(self)
+        self.map = StreamingMap(self, self.map_path) if self.map_path else Map(self)
         self.player = Player(self)
 
         # ObjectRenderer loads textures — create early so we fail-fast on missing assets
@@ -61,6 +106,7 @@ class Game:
 
         # Raycasting depends on object_renderer.wall_textures
         self.raycasting = RayCasting(self)
+        self.resolution.apply()
 
         # Remaining systems
         self.object_handler = ObjectHandler(self)
@@ -68,46 +114,175 @@ class Game:
         self.sound = Sound(self)
         self.pathfinding = PathFinding(self)
 
+        self.play_music()
+
+    def play_music(self):
         # Play music if loaded (some environments may disable audio)
         try:
             pg.mixer.music.play(-1)
         except Exception:
             pass
 
+    def restart(self):
+        """Ask for a new round (win / game over); see reset_level."""
+        self.restart_pending = True
+
+    def reset_level(self):
+        """
+        Start a new round without reloading anything: the map, renderer textures, ray
+        caster, weapon, sounds and pathfinding graph are kept, and only the player,
+        the NPCs and the timers are reset (a streamed map pages back to the spawn).
+        new_game rebuilds everything instead.
+        """
+        self.restart_pending = False
+        self.global_trigger = False
+        self.next_global_event = self.sim_time + self.global_event_time
+        self.player.reset()
+        self.map.reset()
+        self.weapon.reset()
+        self.pathfinding.reset()
+        self.object_handler.reset()
+        self.play_music()
+
     def update(self):
-        # core update order
-        self.player.update()
-        self.raycasting.update()
-        self.object_handler.update()
-        self.weapon.update()
-
-        pg.display.flip()
-        # avoid zero delta_time; keep it in ms
-        self.delta_time = max(1, self.clock.tick(FPS))
+        """Advance the simulation by one fixed SIMULATION_STEP."""
+        self.delta_time = SIMULATION_STEP
+        self.sim_time += SIMULATION_STEP
+        self.global_trigger = self.sim_time >= self.next_global_event
+        if self.global_trigger:
+            self.next_global_event += self.global_event_time
+
+        # core update order, each stage timed by the profiler
+        probe = self.profiler.probe
+        with probe('player'):
+            self.player.update()
+            # a streamed map pages chunks in and out around the player's new position
+            self.map.update()
+        with probe('objects'):
+            self.object_handler.update()
+        with probe('weapon'):
+            self.weapon.update()
+        # after the whole step, so no NPC is still updating against the old round
+        if self.restart_pending:
+            self.reset_level()
+
+    def render(self, alpha=1.0):
+        """
+        Draw one frame. `alpha` (0..1) is how far real time has moved past the last
+        simulation step; the camera is drawn that far toward its next position.
+        """
+        probe = self.profiler.probe
+        with self.player.interpolated(alpha):
+            with probe('raycasting'):
+                self.raycasting.update()
+            with probe('sprites'):
+                self.object_handler.project_sprites()
+            self.draw()
+        # the stages timed so far are this frame's work, before any waiting
+        self.resolution.update(sum(self.profiler.current.values()))
+
+        if self.headless:
+            return
+        with probe('flip'):
+            pg.display.flip()
+        with probe('wait'):
+            self.clock.tick(FPS)
         pg.display.set_caption(f'{self.clock.get_fps():.1f}')
 
+    def get_ticks(self):
+        """Simulated milliseconds since start (advances only with simulation steps)."""
+        return self.sim_time
+
+    def flip_and_wait(self, ms):
+        """Show the current frame for `ms` (win / game over screens); no-op when headless."""
+        if not self.headless:
+            pg.display.flip()
+            pg.time.delay(ms)
+
     def draw(self):
         # object_renderer handles background + sprites; weapon drawn on top
-        self.object_renderer.draw()
-        self.weapon.draw()
+        with self.profiler.probe('draw'):
+            self.object_renderer.draw()
+            self.weapon.draw()
+        if self.profiler.show_overlay:
+            self.profiler.draw(self.screen)
+        if self.resolution.enabled:
+            self.resolution.draw(self.screen)
+
+    def quit(self):
+        if self.profile_path:
+            self.profiler.export(self.profile_path)
+        pg.quit()
 
     def check_events(self):
-        self.global_trigger = False
-        for event in pg.event.get():
+        self.input.next_frame()
+        for event in self.input.get_events():
             if event.type == pg.QUIT or (event.type == pg.KEYDOWN and event.key == pg.K_ESCAPE):
-                pg.quit()
+                self.quit()
                 sys.exit()
-            elif event.type == self.global_event:
-                self.global_trigger = True
+            elif event.type == pg.KEYDOWN and event.key == self.profiler_key:
+                self.profiler.toggle_overlay()
             self.player.single_fire_event(event)
 
     def run(self):
+        """
+        Fixed-timestep loop: real time is banked in `lag` and spent in SIMULATION_STEP
+        updates, then one frame is rendered. Slow frames only mean fewer frames, not a
+        slower game; MAX_FRAME_TIME caps the catch-up after a long stall.
+        """
+        self.profiler.begin()
+        previous = time.perf_counter()
+        lag = 0.0
         while True:
+            now = time.perf_counter()
+            lag += min((now - previous) * 1000, MAX_FRAME_TIME)
+            previous = now
+
+            self.check_events()
+            while lag >= SIMULATION_STEP:
+                self.update()
+                lag -= SIMULATION_STEP
+            self.render(lag / SIMULATION_STEP)
+            self.profiler.end_frame()
+
+    def run_frames(self, frames):
+        """Run `frames` frames of one simulation step each, as fast as possible; returns frames per second."""
+        start = time.perf_counter()
+        self.profiler.begin()
+        for _ in range(frames):
             self.check_events()
             self.update()
-            self.draw()
+            self.render()
+            self.profiler.end_frame()
+        return frames / max(time.perf_counter() - start, 1e-9)
 
 
 if __name__ == '__main__':
-    game = Game()
-    game.run()
+    parser = argparse.ArgumentParser(description='DOOM-style raycaster')
+    parser.add_argument('--headless', action='store_true',
+                        help='run a scripted simulation without a window and report FPS')
+    parser.add_argument('--frames', type=int, default=600, help='frames to simulate in headless mode')
+    parser.add_argument('--seed', type=int, default=None, help='random seed (headless default: 0)')
+    parser.add_argument('--profile-out', default=None,
+                        help='write per-frame stage timings to this .csv or .json file on exit')
+    parser.add_argument('--dynamic-res', action='store_true', default=DYNAMIC_RESOLUTION,
+                        help='lower the ray count when frames run over RESOLUTION_TARGET_MS')
+    parser.add_argument('--map', default=MAP_FILE,
+                        help='stream the level from this map file (see map_file.py)')
+    args = parser.parse_args()
+
+    if args.headless:
+        seed = 0 if args.seed is None else args.seed
+        game = Game(headless=True, seed=seed, input_script=patrol_script(), profile_path=args.profile_out,
+                    dynamic_resolution=args.dynamic_res, map_path=args.map)
+        fps = game.run_frames(args.frames)
+        print(f'{args.frames} frames, {fps:.1f} fps (seed {seed})')
+        if game.resolution.enabled:
+            print(f'  {game.resolution.label()}')
+        for stage, points in game.profiler.summary().items():
+            print(f'  {stage:<12} p50 {points["p50"]:7.2f}  p95 {points["p95"]:7.2f}  p99 {points["p99"]:7.2f} ms')
+        game.quit()
+    else:
+        game = Game(seed=args.seed, profile_path=args.profile_out, dynamic_resolution=args.dynamic_res,
+                    map_path=args.map)
+        game.run()
@@ -1,4 +1,13 @@
 import pygame as pg
+from collections.abc import Mapping
+from settings import MAP_CHUNK_RADIUS, MAP_PREPARE_CHUNKS, PLAYER_POS
+from map_file import MapFile
+
+# numpy is optional: only the vectorized raycaster needs the array view of the grid
+try:
+    import numpy as np
+except ImportError:
+    np = None
 
 _ = False
 mini_map = [
@@ -37,21 +46,280 @@ mini_map = [
 ]
 
 
+class WorldMapView(Mapping):
+    """
+    Read-only dict-like view of the map grid, keyed by (x, y) tiles.
+    Keeps the old `world_map` dict API working without storing a tuple per wall.
+    """
+
+    def __init__(self, map_):
+        self.map = map_
+
+    def __getitem__(self, pos):
+        value = self.map.get_tile(*pos)
+        if not value:
+            raise KeyError(pos)
+        return value
+
+    def __contains__(self, pos):
+        return self.map.is_wall(*pos)
+
+    def __iter__(self):
+        cols = self.map.grid_cols
+        origin_x, origin_y = self.map.origin
+        for index, value in enumerate(self.map.grid):
+            if value:
+                yield origin_x + index % cols, origin_y + index // cols
+
+    def __len__(self):
+        return self.map.num_walls
+
+
 class Map:
-    def __init__(self, game):
+    # StreamingMap holds only the chunks around the player
+    streaming = False
+
+    def __init__(self, game, mini_map=mini_map):
         self.game = game
         self.mini_map = mini_map
-        self.world_map = {}
         self.rows = len(self.mini_map)
         self.cols = len(self.mini_map[0])
+        self.spawn = PLAYER_POS
+        # flat row-major grid, one byte per tile: 0 = empty, otherwise texture id
+        self.grid = bytearray(self.rows * self.cols)
+        # the grid covers grid_cols x grid_rows tiles from map tile `origin` (all of it here)
+        self.grid_cols, self.grid_rows = self.cols, self.rows
+        self.origin = 0, 0
+        self.grid_array = None
+        self.num_walls = 0
+        self.world_map = WorldMapView(self)
         self.get_map()
 
     def get_map(self):
         for j, row in enumerate(self.mini_map):
             for i, value in enumerate(row):
                 if value:
-                    self.world_map[(i, j)] = value
+                    self.grid[j * self.cols + i] = value
+                    self.num_walls += 1
+
+        # (rows, cols) numpy view sharing memory with the flat grid
+        if np is not None:
+            self.grid_array = np.frombuffer(self.grid, dtype=np.uint8).reshape(self.rows, self.cols)
+
+    def get_tile(self, x, y):
+        """Texture id of tile (x, y), 0 for empty or out-of-bounds tiles."""
+        if 0 <= x < self.cols and 0 <= y < self.rows:
+            return self.grid[y * self.cols + x]
+        return 0
+
+    def is_wall(self, x, y):
+        return 0 <= x < self.cols and 0 <= y < self.rows and self.grid[y * self.cols + x] != 0
+
+    def is_wall_array(self, x, y):
+        """is_wall for numpy int arrays of tile coordinates."""
+        inside = (x >= 0) & (x < self.cols) & (y >= 0) & (y < self.rows)
+        walls = np.zeros(x.shape, dtype=bool)
+        walls[inside] = self.grid_array[y[inside], x[inside]] != 0
+        return walls
+
+    def open_tiles(self, key=None):
+        """Every empty tile, row by row (PathFinding builds its graph from these)."""
+        cols = self.cols
+        return [(index % cols, index // cols) for index, value in enumerate(self.grid) if not value]
+
+    def update(self):
+        pass
+
+    def reset(self):
+        pass
 
     def draw(self):
         [pg.draw.rect(self.game.screen, 'darkgray', (pos[0] * 100, pos[1] * 100, 100, 100), 2)
-         for pos in self.world_map]
\ No newline at end of file
+         for pos in self.world_map]
+
+
+class StreamingMap(Map):
+    """
+    Map streamed from a chunked map file (map_file.py). Only a window of
+    (2 * MAP_CHUNK_RADIUS + 1) ** 2 chunks around the player is resident, so memory and
+    startup do not grow with the map's area. The window moves once the player is more
+    than one chunk from its centre, which keeps at least (MAP_CHUNK_RADIUS - 1) chunks
+    of map (more than MAX_DEPTH) between the player and its edge.
+
+    grid / grid_array hold the window; tiles are still addressed in map coordinates
+    (subtract `origin` to index the grid). Tiles outside the window count as walls.
+    When chunks come and go, PathFinding and ObjectHandler add or drop their pieces
+    through update_chunks.
+    """
+    streaming = True
+
+    def __init__(self, game, path):
+        self.game = game
+        self.file = MapFile(path)
+        self.cols, self.rows = self.file.cols, self.file.rows
+        self.chunk_size = self.file.chunk_size
+        self.num_chunks = self.file.chunks_x * self.file.chunks_y
+        self.spawn = self.file.spawn
+        side = (2 * MAP_CHUNK_RADIUS + 1) * self.chunk_size
+        self.grid = bytearray(side * side)
+        self.grid_cols = self.grid_rows = side
+        self.origin = 0, 0
+        self.grid_array = None
+        if np is not None:
+            self.grid_array = np.frombuffer(self.grid, dtype=np.uint8).reshape(side, side)
+        self.num_walls = 0
+        self.world_map = WorldMapView(self)
+        # resident chunk keys and the chunk the window is centred on
+        self.chunks = set()
+        self.center = None
+        # chunks a window move toward the player would load, nearest first, and the
+        # player chunk they were listed for (see update)
+        self.ahead = []
+        self.ahead_of = None
+        self.spawn_chunks = self.chunks_around(self.chunk_of(*self.spawn), MAP_CHUNK_RADIUS)
+        self.recenter(self.chunk_of(*self.spawn))
+
+    def chunk_of(self, x, y):
+        return int(x) // self.chunk_size, int(y) // self.chunk_size
+
+    def chunk_index(self, key):
+        """Position of chunk `key` in the file's chunk order, 0 .. chunks_x * chunks_y - 1."""
+        return key[1] * self.file.chunks_x + key[0]
+
+    def chunk_rect(self, key):
+        """Map tiles (x0, y0, x1, y1) of chunk `key`, clipped to the map."""
+        size = self.chunk_size
+        x0, y0 = key[0] * size, key[1] * size
+        return x0, y0, min(x0 + size, self.cols), min(y0 + size, self.rows)
+
+    def chunks_around(self, center, radius):
+        """Keys of the chunks of the map within `radius` chunks of chunk `center`."""
+        return {(center[0] + i, center[1] + j)
+                for j in range(-radius, radius + 1) for i in range(-radius, radius + 1)
+                if 0 <= center[0] + i < self.file.chunks_x and 0 <= center[1] + j < self.file.chunks_y}
+
+    def chunk_block(self, key):
+        """
+        Tiles of chunk `key` and a one-tile margin around it, read from the map file (not
+        the window): a (chunk_size + 2) square, row-major, tiles outside the map as walls.
+        """
+        size = self.chunk_size
+        side = size + 2
+        x0, y0 = key[0] * size - 1, key[1] * size - 1
+        block = bytearray(b'\1' * (side * side))
+        for j in range(side):
+            y = y0 + j
+            if not 0 <= y < self.rows:
+                continue
+            cy, row = divmod(y, size)
+            # the margin tile on the left, the chunk's own row, the margin tile on the right
+            for cx, first, last in ((key[0] - 1, size - 1, size), (key[0], 0, size), (key[0] + 1, 0, 1)):
+                last = min(last, self.cols - cx * size)
+                if cx < 0 or last <= first:
+                    continue
+                tiles = self.file.chunk(cx, cy)
+                start = j * side + cx * size + first - x0
+                block[start:start + last - first] = tiles[row * size + first:row * size + last]
+        return block
+
+    def recenter(self, center):
+        """Centre the window on chunk `center`; returns the (loaded, evicted) chunk keys."""
+        size, radius, side = self.chunk_size, MAP_CHUNK_RADIUS, self.grid_cols
+        chunks = self.chunks_around(center, radius)
+        loaded, evicted = chunks - self.chunks, self.chunks - chunks
+        self.chunks, self.center = chunks, center
+
+        # rebuilt in place: grid_array stays a view of the same buffer
+        origin_x, origin_y = (center[0] - radius) * size, (center[1] - radius) * size
+        self.origin = origin_x, origin_y
+        self.grid[:] = bytes(len(self.grid))
+        for cx, cy in chunks:
+            tiles = self.file.chunk(cx, cy)
+            start = (cy * size - origin_y) * side + cx * size - origin_x
+            for j in range(size):
+                self.grid[start + j * side:start + j * side + size] = tiles[j * size:(j + 1) * size]
+        self.num_walls = len(self.grid) - self.grid.count(0)
+        return loaded, evicted
+
+    def update(self):
+        """
+        Move the window a chunk toward the player once the player is more than one chunk
+        from its centre. Meanwhile, prepare the pathfinding graph of the chunks the next
+        moves would load, MAP_PREPARE_CHUNKS a tick, so a move only has to link them in.
+        """
+        player_chunk = self.chunk_of(*self.game.player.pos)
+        dx, dy = player_chunk[0] - self.center[0], player_chunk[1] - self.center[1]
+        if max(abs(dx), abs(dy)) > 2:
+            # teleported (or a new round): straight to the player
+            self.page(player_chunk)
+        elif max(abs(dx), abs(dy)) > 1:
+            # one chunk toward the player, so each move loads a single row or column of chunks
+            self.page((self.center[0] + (dx > 0) - (dx < 0), self.center[1] + (dy > 0) - (dy < 0)))
+
+        if player_chunk != self.ahead_of:
+            # the window moves toward the player's chunk, so it stays within this of it
+            self.ahead_of = player_chunk
+            self.ahead = sorted(self.chunks_around(player_chunk, MAP_CHUNK_RADIUS + 1) - self.chunks,
+                                key=lambda key: max(abs(key[0] - player_chunk[0]), abs(key[1] - player_chunk[1])),
+                                reverse=True)
+        pathfinding = self.game.pathfinding
+        prepared = 0
+        while self.ahead and prepared < MAP_PREPARE_CHUNKS:
+            key = self.ahead.pop()
+            if key not in pathfinding.chunk_links:
+                pathfinding.prepare_chunk(key)
+                prepared += 1
+
+    def reset(self):
+        """
+        New round: back to the window around the player (now at the spawn). Only the
+        pathfinding graph follows here; ObjectHandler.reset respawns the NPCs afterwards.
+        """
+        loaded, evicted = self.recenter(self.chunk_of(*self.game.player.pos))
+        if loaded or evicted:
+            self.game.pathfinding.update_chunks(loaded, evicted)
+
+    def page(self, center):
+        loaded, evicted = self.recenter(center)
+        if loaded or evicted:
+            self.game.pathfinding.update_chunks(loaded, evicted)
+            self.game.object_handler.update_chunks(loaded, evicted)
+
+    def open_tiles(self, key=None):
+        """Empty tiles of chunk `key`, or of every resident chunk."""
+        if key is None:
+            return [tile for key in sorted(self.chunks) for tile in self.open_tiles(key)]
+        x0, y0, x1, y1 = self.chunk_rect(key)
+        origin_x, origin_y = self.origin
+        side = self.grid_cols
+        tiles = []
+        # resident chunks are always inside the window
+        for y in range(y0, y1):
+            start = (y - origin_y) * side - origin_x
+            row = self.grid[start + x0:start + x1]
+            tiles.extend((x0 + i, y) for i, value in enumerate(row) if not value)
+        return tiles
+
+    def get_tile(self, x, y):
+        """Texture id of tile (x, y), 0 for empty tiles and tiles outside the window."""
+        x -= self.origin[0]
+        y -= self.origin[1]
+        if 0 <= x < self.grid_cols and 0 <= y < self.grid_rows:
+            return self.grid[y * self.grid_cols + x]
+        return 0
+
+    def is_wall(self, x, y):
+        if 0 <= x < self.cols and 0 <= y < self.rows:
+            x -= self.origin[0]
+            y -= self.origin[1]
+            if 0 <= x < self.grid_cols and 0 <= y < self.grid_rows:
+                return self.grid[y * self.grid_cols + x] != 0
+        return True
+
+    def is_wall_array(self, x, y):
+        walls = np.ones(x.shape, dtype=bool)
+        grid_x, grid_y = x - self.origin[0], y - self.origin[1]
+        inside = ((x >= 0) & (x < self.cols) & (y >= 0) & (y < self.rows)
+                  & (grid_x >= 0) & (grid_x < self.grid_cols) & (grid_y >= 0) & (grid_y < self.grid_rows))
+        walls[inside] = self.grid_array[grid_y[inside], grid_x[inside]] != 0
+        return walls
@@ -0,0 +1,126 @@
+# map_file.py
+"""
+Chunked map files: the tile grid of a level cut into square chunks, one byte per tile
+(0 = empty, otherwise texture id), memory-mapped at runtime so map.StreamingMap only
+touches the chunks around the player.
+
+    python map_file.py export resources/maps/e1m1.map          # the built-in mini_map
+    python map_file.py generate resources/maps/big.map 1024 1024 --seed 1
+
+Layout: header (magic, version, cols, rows, chunk size, player spawn), then every chunk
+in row-major chunk order, each chunk_size * chunk_size bytes in row-major tile order.
+Chunks on the right and bottom edges are padded with empty tiles.
+"""
+import mmap
+import random
+import struct
+from settings import MAP_CHUNK_SIZE, PLAYER_POS
+
+MAGIC = b'DOOMMAP\0'
+VERSION = 1
+HEADER = struct.Struct('<8sIIIIff')
+
+
+class MapFile:
+    """Read side: a memory-mapped map file (see map.StreamingMap)."""
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f:
+            self.data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self.cols, self.rows, self.chunk_size, spawn_x, spawn_y = HEADER.unpack_from(self.data)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f'not a version {VERSION} map file')
+        self.spawn = spawn_x, spawn_y
+        self.chunks_x = -(-self.cols // self.chunk_size)
+        self.chunks_y = -(-self.rows // self.chunk_size)
+        if len(self.data) < HEADER.size + self.chunks_x * self.chunks_y * self.chunk_size ** 2:
+            raise ValueError('truncated map file')
+        self.view = memoryview(self.data)
+
+    def chunk(self, cx, cy):
+        """Tiles of chunk (cx, cy), row-major, as a read-only view into the file."""
+        size = self.chunk_size ** 2
+        start = HEADER.size + (cy * self.chunks_x + cx) * size
+        return self.view[start:start + size]
+
+
+def write_map(path, cols, rows, get_chunk, spawn=PLAYER_POS, chunk_size=MAP_CHUNK_SIZE):
+    """Write a map file, asking get_chunk(cx, cy) for each chunk's chunk_size ** 2 tile bytes in turn."""
+    with open(path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, VERSION, cols, rows, chunk_size, *spawn))
+        for cy in range(-(-rows // chunk_size)):
+            for cx in range(-(-cols // chunk_size)):
+                f.write(get_chunk(cx, cy))
+
+
+def export(path, mini_map, spawn=PLAYER_POS, chunk_size=MAP_CHUNK_SIZE):
+    """Write a list-of-rows grid (like map.mini_map) as a map file."""
+    rows, cols = len(mini_map), len(mini_map[0])
+
+    def get_chunk(cx, cy):
+        tiles = bytearray(chunk_size ** 2)
+        for j in range(chunk_size):
+            y = cy * chunk_size + j
+            for i in range(chunk_size):
+                x = cx * chunk_size + i
+                if x < cols and y < rows and mini_map[y][x]:
+                    tiles[j * chunk_size + i] = mini_map[y][x]
+        return tiles
+
+    write_map(path, cols, rows, get_chunk, spawn, chunk_size)
+
+
+def generate(path, cols, rows, seed=0, wall_ratio=0.08, chunk_size=MAP_CHUNK_SIZE):
+    """
+    Write a cols x rows test level: a solid border and short wall segments scattered
+    over open floor. Each chunk is drawn from its own seed, so any size is written in
+    one pass without holding the grid.
+    """
+    spawn = (1.5, 1.5)
+    textures = (1, 2, 3, 4, 5)
+
+    def get_chunk(cx, cy):
+        rng = random.Random(f'{seed}:{cx}:{cy}')
+        tiles = bytearray(chunk_size ** 2)
+        for _ in range(int(chunk_size ** 2 * wall_ratio / 2)):
+            # two-tile segments, horizontal or vertical
+            i, j = rng.randrange(chunk_size - 1), rng.randrange(chunk_size - 1)
+            di, dj = (1, 0) if rng.random() < 0.5 else (0, 1)
+            texture = rng.choice(textures)
+            tiles[j * chunk_size + i] = tiles[(j + dj) * chunk_size + i + di] = texture
+        for j in range(chunk_size):
+            y = cy * chunk_size + j
+            for i in range(chunk_size):
+                x = cx * chunk_size + i
+                if x >= cols or y >= rows:
+                    tiles[j * chunk_size + i] = 0
+                elif x in (0, cols - 1) or y in (0, rows - 1):
+                    tiles[j * chunk_size + i] = 1
+                elif x <= 3 and y <= 3:
+                    # keep the spawn area open
+                    tiles[j * chunk_size + i] = 0
+        return tiles
+
+    write_map(path, cols, rows, get_chunk, spawn, chunk_size)
+
+
+if __name__ == '__main__':
+    import argparse
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest='command', required=True)
+    export_parser = commands.add_parser('export', help='write the built-in mini_map')
+    export_parser.add_argument('path')
+    generate_parser = commands.add_parser('generate', help='write a generated test level')
+    generate_parser.add_argument('path')
+    generate_parser.add_argument('cols', type=int)
+    generate_parser.add_argument('rows', type=int)
+    generate_parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    if args.command == 'export':
+        from map import mini_map
+        export(args.path, mini_map)
+    else:
+        generate(args.path, args.cols, args.rows, args.seed)
+    print(f'map written to {args.path}')
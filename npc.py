@@ -2,12 +2,53 @@
 import math
 import pygame as pg
 from random import randint, random
-from sprite_object import AnimatedSprite
+from assets import FrameCursor, LazyFrameCursor
+from sprite_object import AnimatedSprite, AnimatedSpriteSpec, lazy_frames
 from utils.resource_path import resource_path
 from settings import HALF_WIDTH, MAX_DEPTH
 
+# NPC speeds are in tiles per 1/60 s, scaled by the simulation step
+NPC_SPEED_STEP = 1000 / 60
+
+
+class NPCSpec(AnimatedSpriteSpec):
+    """
+    AnimatedSpriteSpec plus what every NPC of a type shares: its frame sets and stats.
+    attack_dist None means each NPC rolls its own (3 to 6 tiles).
+    """
+    __slots__ = ('folder', 'idle_frames', 'walk_frames', 'attack_frames', 'death_frames', 'pain_frames',
+                 'attack_dist', 'speed', 'size', 'health', 'attack_damage', 'accuracy')
+
+    def __init__(self, path, scale, shift, animation_time, sprite_folder,
+                 attack_dist=None, speed=0.03, size=20, health=100, attack_damage=10, accuracy=0.15):
+        super().__init__(path, scale, shift, animation_time)
+        self.folder = sprite_folder
+
+        # load animation frames from the chosen sprite folder; combat-only sets load lazily
+        # (prefetched by ObjectHandler.start_combat once any NPC spots the player)
+        base = ['resources', 'sprites', 'npc', sprite_folder]
+        self.attack_frames = lazy_frames(resource_path(*base, 'attack'))
+        self.death_frames = lazy_frames(resource_path(*base, 'death'))
+        self.idle_frames = AnimatedSprite.get_images(resource_path(*base, 'idle')).frames
+        self.pain_frames = lazy_frames(resource_path(*base, 'pain'))
+        self.walk_frames = AnimatedSprite.get_images(resource_path(*base, 'walk')).frames
+
+        self.attack_dist = attack_dist
+        self.speed = speed
+        self.size = size
+        self.health = health
+        self.attack_damage = attack_damage
+        self.accuracy = accuracy
+
 
 class NPC(AnimatedSprite):
+    Spec = NPCSpec
+    # per-type stats over the NPCSpec defaults
+    PARAMS = {}
+    __slots__ = ('attack_images', 'death_images', 'idle_images', 'pain_images', 'walk_images',
+                 'attack_dist', 'health', 'alive', 'pain', 'ray_cast_value', 'frame_counter',
+                 'player_search_trigger', 'ai_slot')
+
     def __init__(self, game, path=None, pos=(10.5, 5.5),
                  scale=0.6, shift=0.38, animation_time=180,
                  sprite_folder='soldier'):
@@ -15,36 +56,32 @@ class NPC(AnimatedSprite):
         sprite_folder: the folder name under resources/sprites/npc/ to load animations from.
                        e.g. 'soldier', 'cyber_demon', 'caco_demon'
         """
-        self.game = game
-        self.sprite_folder = sprite_folder
-
         # default sprite path (walk frame from the chosen folder)
         if path is None:
-            path = resource_path('resources', 'sprites', 'npc', self.sprite_folder, 'walk', 'walk1.png')
+            path = resource_path('resources', 'sprites', 'npc', sprite_folder, 'walk', 'walk1.png')
 
         # initialize AnimatedSprite (base)
-        super().__init__(game, path, pos, scale, shift, animation_time)
-
-        # load animation frames from the chosen sprite folder
-        base = ['resources', 'sprites', 'npc', self.sprite_folder]
-        self.attack_images = self.get_images(resource_path(*base, 'attack'))
-        self.death_images = self.get_images(resource_path(*base, 'death'))
-        self.idle_images = self.get_images(resource_path(*base, 'idle'))
-        self.pain_images = self.get_images(resource_path(*base, 'pain'))
-        self.walk_images = self.get_images(resource_path(*base, 'walk'))
-
-        # default stats (can be overridden by subclasses)
-        self.attack_dist = randint(3, 6)
-        self.speed = 0.03
-        self.size = 20
-        self.health = 100
-        self.attack_damage = 10
-        self.accuracy = 0.15
+        super().__init__(game, path, pos, scale, shift, animation_time,
+                         sprite_folder=sprite_folder, **self.PARAMS)
+
+        # this NPC's position in each of its type's frame sets
+        spec = self.spec
+        fallback = (self.image,)
+        self.attack_images = LazyFrameCursor(spec.attack_frames, fallback)
+        self.death_images = LazyFrameCursor(spec.death_frames, fallback)
+        self.idle_images = FrameCursor(spec.idle_frames)
+        self.pain_images = LazyFrameCursor(spec.pain_frames, fallback)
+        self.walk_images = FrameCursor(spec.walk_frames)
+
+        self.attack_dist = randint(3, 6) if spec.attack_dist is None else spec.attack_dist
+        self.health = spec.health
         self.alive = True
         self.pain = False
         self.ray_cast_value = False
         self.frame_counter = 0
         self.player_search_trigger = False
+        # position in ObjectHandler.npc_list, which staggers its idle ticks (see schedule_npcs)
+        self.ai_slot = 0
 
     def update(self):
         self.check_animation_time()
@@ -52,12 +89,13 @@ class NPC(AnimatedSprite):
         self.run_logic()
 
     def check_wall(self, x, y):
-        return (x, y) not in self.game.map.world_map
+        return not self.game.map.is_wall(x, y)
 
     def check_wall_collision(self, dx, dy):
-        if self.check_wall(int(self.x + dx * self.size), int(self.y)):
+        size = self.spec.size
+        if self.check_wall(int(self.x + dx * size), int(self.y)):
             self.x += dx
-        if self.check_wall(int(self.x), int(self.y + dy * self.size)):
+        if self.check_wall(int(self.x), int(self.y + dy * size)):
             self.y += dy
 
     def movement(self):
@@ -66,9 +104,11 @@ class NPC(AnimatedSprite):
 
         if next_pos not in self.game.object_handler.npc_positions:
             angle = math.atan2(next_y + 0.5 - self.y, next_x + 0.5 - self.x)
-            dx = math.cos(angle) * self.speed
-            dy = math.sin(angle) * self.speed
+            speed = self.spec.speed * self.game.delta_time / NPC_SPEED_STEP
+            dx = math.cos(angle) * speed
+            dy = math.sin(angle) * speed
             self.check_wall_collision(dx, dy)
+            self.game.object_handler.npc_hash.move(self)
 
     def attack(self):
         if self.animation_trigger:
@@ -76,8 +116,9 @@ class NPC(AnimatedSprite):
                 self.game.sound.npc_shot.play()
             except pg.error:
                 pass
-            if random() < self.accuracy:
-                self.game.player.get_damage(self.attack_damage)
+            spec = self.spec
+            if random() < spec.accuracy:
+                self.game.player.get_damage(spec.attack_damage)
 
     def animate_death(self):
         if not self.alive:
@@ -94,14 +135,17 @@ class NPC(AnimatedSprite):
     def check_hit_in_npc(self):
         if self.ray_cast_value and self.game.player.shot:
             if HALF_WIDTH - self.sprite_half_width < self.screen_x < HALF_WIDTH + self.sprite_half_width:
-                try:
-                    self.game.sound.npc_pain.play()
-                except pg.error:
-                    pass
-                self.game.player.shot = False
-                self.pain = True
-                self.health -= self.game.weapon.damage
-                self.check_health()
+                self.take_hit()
+
+    def take_hit(self):
+        try:
+            self.game.sound.npc_pain.play()
+        except pg.error:
+            pass
+        self.game.player.shot = False
+        self.pain = True
+        self.health -= self.game.weapon.damage
+        self.check_health()
 
     def check_health(self):
         if self.health < 1:
@@ -113,13 +157,16 @@ class NPC(AnimatedSprite):
 
     def run_logic(self):
         if self.alive:
-            self.ray_cast_value = self.ray_cast_player_npc()
+            # computed for all NPCs at once by ObjectHandler.update_line_of_sight
+            self.ray_cast_value = self in self.game.object_handler.visible_npcs
             self.check_hit_in_npc()
 
             if self.pain:
                 self.animate_pain()
 
             elif self.ray_cast_value:
+                if not self.player_search_trigger:
+                    self.game.object_handler.start_combat()
                 self.player_search_trigger = True
 
                 if self.dist < self.attack_dist:
@@ -138,13 +185,22 @@ class NPC(AnimatedSprite):
         else:
             self.animate_death()
 
+    @property
+    def engaged(self):
+        """Thinks every tick: alerted, in pain, or still playing its death animation."""
+        if self.alive:
+            return self.player_search_trigger or self.pain
+        return not self.death_images.ready() or self.frame_counter < len(self.death_images) - 1
+
     @property
     def map_pos(self):
         return int(self.x), int(self.y)
 
     def ray_cast_player_npc(self):
-        if self.game.player.map_pos == self.map_pos:
+        map_pos = self.map_pos
+        if self.game.player.map_pos == map_pos:
             return True
+        is_wall = self.game.map.is_wall
 
         wall_dist_v, wall_dist_h = 0, 0
         player_dist_v, player_dist_h = 0, 0
@@ -152,7 +208,8 @@ class NPC(AnimatedSprite):
         ox, oy = self.game.player.pos
         x_map, y_map = self.game.player.map_pos
 
-        ray_angle = self.theta
+        # same angle as self.theta, but independent of when get_sprite last ran
+        ray_angle = math.atan2(self.y - oy, self.x - ox)
 
         sin_a = math.sin(ray_angle)
         cos_a = math.cos(ray_angle)
@@ -168,10 +225,10 @@ class NPC(AnimatedSprite):
 
         for i in range(MAX_DEPTH):
             tile_hor = int(x_hor), int(y_hor)
-            if tile_hor == self.map_pos:
+            if tile_hor == map_pos:
                 player_dist_h = depth_hor
                 break
-            if tile_hor in self.game.map.world_map:
+            if is_wall(*tile_hor):
                 wall_dist_h = depth_hor
                 break
             x_hor += dx
@@ -189,10 +246,10 @@ class NPC(AnimatedSprite):
 
         for i in range(MAX_DEPTH):
             tile_vert = int(x_vert), int(y_vert)
-            if tile_vert == self.map_pos:
+            if tile_vert == map_pos:
                 player_dist_v = depth_vert
                 break
-            if tile_vert in self.game.map.world_map:
+            if is_wall(*tile_vert):
                 wall_dist_v = depth_vert
                 break
             x_vert += dx
@@ -208,51 +265,39 @@ class NPC(AnimatedSprite):
 
     def draw_ray_cast(self):
         pg.draw.circle(self.game.screen, 'red', (100 * self.x, 100 * self.y), 15)
-        if self.ray_cast_player_npc():
+        if self.ray_cast_value:
             pg.draw.line(self.game.screen, 'orange', (100 * self.game.player.x, 100 * self.game.player.y),
                          (100 * self.x, 100 * self.y), 2)
 
 
 class SoldierNPC(NPC):
+    # small and low damage
+    PARAMS = dict(attack_dist=4, speed=0.035, size=18, health=90, attack_damage=8, accuracy=0.12)
+    __slots__ = ()
+
     def __init__(self, game, path=None, pos=(10.5, 5.5),
                  scale=0.5, shift=0.38, animation_time=160):
         # tell base to load 'soldier' sprite set
         super().__init__(game, path, pos, scale, shift, animation_time, sprite_folder='soldier')
 
-        # small and low damage
-        self.attack_dist = 4
-        self.speed = 0.035
-        self.size = 18
-        self.health = 90
-        self.attack_damage = 8
-        self.accuracy = 0.12
-
 
 class CyberDemonNPC(NPC):
+    # medium size and medium damage
+    PARAMS = dict(attack_dist=6, speed=0.045, size=26, health=250, attack_damage=14, accuracy=0.22)
+    __slots__ = ()
+
     def __init__(self, game, path=None, pos=(11.5, 6.0),
                  scale=0.85, shift=0.04, animation_time=210):
         # tell base to load 'cyber_demon' sprite set
         super().__init__(game, path, pos, scale, shift, animation_time, sprite_folder='cyber_demon')
 
-        # medium size and medium damage
-        self.attack_dist = 6
-        self.speed = 0.045
-        self.size = 26
-        self.health = 250
-        self.attack_damage = 14
-        self.accuracy = 0.22
-
 
 class CacoDemonNPC(NPC):
+    # big and fast but lower health (dies easier)
+    PARAMS = dict(attack_dist=1.5, speed=0.065, size=36, health=120, attack_damage=20, accuracy=0.18)
+    __slots__ = ()
+
     def __init__(self, game, path=None, pos=(10.5, 6.5),
                  scale=1.05, shift=0.27, animation_time=200):
         # tell base to load 'caco_demon' sprite set
         super().__init__(game, path, pos, scale, shift, animation_time, sprite_folder='caco_demon')
-
-        # big and fast but lower health (dies easier)
-        self.attack_dist = 1.5
-        self.speed = 0.065
-        self.size = 36
-        self.health = 120
-        self.attack_damage = 20
-        self.accuracy = 0.18
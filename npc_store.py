@@ -0,0 +1,258 @@
+# npc_store.py
+import math
+from random import random
+import pygame as pg
+from settings import *
+from line_of_sight import player_sees_npcs
+from npc import NPC_SPEED_STEP
+
+# numpy is optional: ObjectHandler only builds an NPCStore when it is installed
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# NPC attribute -> store column; NPC objects stay in sync, so columns can be rebuilt from them
+FLOAT_COLUMNS = {
+    'x': 'x', 'y': 'y', 'health': 'health', 'attack_dist': 'attack_dist',
+    'animation_time_prev': 'animation_prev', 'sprite_half_width': 'sprite_half_width',
+}
+# NPCSpec attribute -> store column (per-type values, repeated per NPC)
+SPEC_COLUMNS = {
+    'speed': 'speed', 'size': 'size', 'accuracy': 'accuracy', 'animation_time': 'animation_time',
+    'image_half_width': 'image_half_width', 'scale': 'sprite_scale', 'image_ratio': 'image_ratio',
+}
+BOOL_COLUMNS = {'alive': 'alive', 'pain': 'pain', 'player_search_trigger': 'search', 'ray_cast_value': 'sees_player'}
+
+# which frame set an NPC animates this step
+IDLE, WALK, ATTACK, PAIN = range(4)
+STATE_IMAGES = {IDLE: 'idle_images', WALK: 'walk_images', ATTACK: 'attack_images', PAIN: 'pain_images'}
+
+
+class NPCStore:
+    """
+    Structure-of-arrays backend for ObjectHandler (NPC_BACKEND = 'arrays'): positions,
+    health, state, per-type parameters, animation clocks and projection values of every
+    NPC live in numpy columns, and one update() moves, projects, line-of-sight tests
+    and times the animations of all of them as whole-array operations.
+
+    Python only runs per NPC for discrete events: a frame change, an attack roll, a hit,
+    a death. Those write both the column and the NPC object, and positions are written
+    back every step, so the NPC objects stay valid for drawing and for everything else
+    that reads them.
+    """
+
+    def __init__(self, game):
+        self.game = game
+        self.npcs = []
+        # columns are rebuilt from the NPC objects after NPCs are added or removed
+        self.dirty = True
+
+    def add(self, npc):
+        self.npcs.append(npc)
+        self.dirty = True
+
+    def clear(self):
+        self.npcs = []
+        self.dirty = True
+
+    def build(self):
+        npcs = self.npcs
+        for attr, column in FLOAT_COLUMNS.items():
+            setattr(self, column, np.array([getattr(npc, attr) for npc in npcs], dtype=float))
+        for attr, column in SPEC_COLUMNS.items():
+            setattr(self, column, np.array([getattr(npc.spec, attr) for npc in npcs], dtype=float))
+        for attr, column in BOOL_COLUMNS.items():
+            setattr(self, column, np.array([getattr(npc, attr) for npc in npcs], dtype=bool))
+        count = len(npcs)
+        # ObjectHandler.add_npc order, so the idle ticks are staggered like ai_slot
+        self.slot = np.arange(count)
+        self.dist = np.zeros(count)
+        self.screen_x = np.zeros(count)
+        self.norm_dist = np.ones(count)
+        self.on_screen = np.zeros(count, dtype=bool)
+        self.dirty = False
+
+    def positions(self):
+        """Tiles of the living NPCs (ObjectHandler.npc_positions)."""
+        if self.dirty:
+            self.build()
+        alive = self.alive
+        return set(zip(self.x[alive].astype(int).tolist(), self.y[alive].astype(int).tolist()))
+
+    def get_sprites(self):
+        """SpriteObject.get_sprite for every NPC at once, from the current camera."""
+        player = self.game.player
+        dx = self.x - player.x
+        dy = self.y - player.y
+        delta = np.arctan2(dy, dx) - player.angle
+        delta = np.where(delta > math.pi, delta - math.tau, delta)
+        delta = np.where(delta < -math.pi, delta + math.tau, delta)
+
+        self.screen_x = (HALF_NUM_RAYS + delta / DELTA_ANGLE) * SCALE
+        self.dist = np.hypot(dx, dy)
+        self.norm_dist = self.dist * np.cos(delta)
+        half_width = self.image_half_width
+        self.on_screen = ((-half_width < self.screen_x) & (self.screen_x < WIDTH + half_width)
+                          & (self.norm_dist > 0.5))
+        np.divide(SCREEN_DIST * self.sprite_scale * self.image_ratio, self.norm_dist,
+                  out=self.sprite_half_width, where=self.on_screen)
+        np.floor_divide(self.sprite_half_width, 2, out=self.sprite_half_width, where=self.on_screen)
+
+    def update(self):
+        """One simulation step of NPC.update for every NPC."""
+        if self.dirty:
+            self.build()
+        if not self.npcs:
+            return
+        game = self.game
+        player = game.player
+        handler = game.object_handler
+
+        self.get_sprites()
+
+        # AI level of detail: the same schedule as ObjectHandler.schedule_npcs
+        alive = self.alive
+        near = alive & (self.dist <= NPC_ACTIVE_RADIUS)
+        if AI_LOD:
+            interval = np.where(self.dist <= AI_NEAR_RADIUS, AI_NEAR_INTERVAL, AI_FAR_INTERVAL)
+            think = ~alive | self.search | self.pain | ((handler.ai_tick + self.slot) % interval == 0)
+            if player.shot:
+                think |= near
+            near &= think
+        else:
+            think = np.ones(len(self.npcs), dtype=bool)
+
+        # check_animation_time
+        now = game.get_ticks()
+        trigger = think & (now - self.animation_prev > self.animation_time)
+        self.animation_prev[trigger] = now
+
+        # line of sight for living NPCs near the player
+        visible = np.zeros(len(self.npcs), dtype=bool)
+        near = np.flatnonzero(near)
+        if len(near):
+            origin_x, origin_y = game.map.origin
+            visible[near] = player_sees_npcs(game.map.grid_array, (player.x - origin_x, player.y - origin_y),
+                                             self.x[near] - origin_x, self.y[near] - origin_y)
+
+        # run_logic: every living NPC that thinks this step notes whether it sees the player
+        npcs = self.npcs
+        noted = alive & think
+        for i in np.flatnonzero(noted & (visible != self.sees_player)).tolist():
+            npcs[i].ray_cast_value = bool(visible[i])
+        self.sees_player[noted] = visible[noted]
+
+        # check_hit_in_npc: the first NPC (in list order) under the crosshair takes the shot
+        if player.shot:
+            hit = np.flatnonzero(visible & (np.abs(self.screen_x - HALF_WIDTH) < self.sprite_half_width))
+            if len(hit):
+                self.hit(hit[0])
+                alive = self.alive
+
+        # run_logic: pick each living NPC's branch
+        pain = alive & self.pain
+        rest = alive & ~self.pain
+        seen = rest & visible
+        attacking = seen & (self.dist < self.attack_dist)
+        moving = (seen & ~attacking) | (rest & ~visible & self.search)
+        state = np.full(len(self.npcs), IDLE)
+        state[moving] = WALK
+        state[attacking] = ATTACK
+        state[pain] = PAIN
+
+        alerted = np.flatnonzero(seen & ~self.search)
+        if len(alerted):
+            handler.start_combat()
+            self.search[alerted] = True
+            for i in alerted.tolist():
+                self.npcs[i].player_search_trigger = True
+
+        # animate: a frame change for every living NPC whose timer fired
+        for i in np.flatnonzero(trigger).tolist():
+            npc = npcs[i]
+            npc.animation_time_prev = now
+            if npc.alive:
+                npc.animate(getattr(npc, STATE_IMAGES[state[i]]), trigger=True)
+
+        # animate_pain ends with the first frame change
+        recovered = np.flatnonzero(pain & trigger)
+        self.pain[recovered] = False
+        for i in recovered.tolist():
+            npcs[i].pain = False
+
+        # attack: one roll per attack frame
+        for i in np.flatnonzero(attacking & trigger).tolist():
+            try:
+                game.sound.npc_shot.play()
+            except pg.error:
+                pass
+            if random() < self.accuracy[i]:
+                player.get_damage(npcs[i].spec.attack_damage)
+
+        self.movement(np.flatnonzero(moving))
+
+        if game.global_trigger:
+            for i in np.flatnonzero(~alive).tolist():
+                npcs[i].animate_death()
+
+    def hit(self, i):
+        """NPC i takes the player's shot."""
+        npc = self.npcs[i]
+        npc.take_hit()
+        self.pain[i] = True
+        self.health[i] = npc.health
+        self.alive[i] = npc.alive
+
+    def movement(self, movers):
+        """NPC.movement for the given NPC indices at once."""
+        if not len(movers):
+            return
+        game = self.game
+        pathfinding = game.pathfinding
+        npc_positions = game.object_handler.npc_positions
+        x, y = self.x[movers], self.y[movers]
+        tile_x, tile_y = x.astype(int), y.astype(int)
+
+        next_x, next_y = pathfinding.get_paths(tile_x, tile_y, game.player.map_pos)
+        free = np.array([pos not in npc_positions for pos in zip(next_x.tolist(), next_y.tolist())], dtype=bool)
+        movers, x, y = movers[free], x[free], y[free]
+        if not len(movers):
+            return
+
+        angle = np.arctan2(next_y[free] + 0.5 - y, next_x[free] + 0.5 - x)
+        speed = self.speed[movers] * game.delta_time / NPC_SPEED_STEP
+        dx = np.cos(angle) * speed
+        dy = np.sin(angle) * speed
+
+        # check_wall_collision, x first, then y from the updated x
+        size = self.size[movers]
+        is_wall = game.map.is_wall_array
+        x = np.where(is_wall((x + dx * size).astype(int), y.astype(int)), x, x + dx)
+        y = np.where(is_wall(x.astype(int), (y + dy * size).astype(int)), y, y + dy)
+        self.x[movers] = x
+        self.y[movers] = y
+
+        npcs = self.npcs
+        for i, new_x, new_y in zip(movers.tolist(), x.tolist(), y.tolist()):
+            npc = npcs[i]
+            npc.x = new_x
+            npc.y = new_y
+
+    def project(self):
+        """Render pass: queue every on-screen NPC as seen from the current camera."""
+        if self.dirty:
+            self.build()
+        if not self.npcs:
+            return
+        self.get_sprites()
+        npcs = self.npcs
+        on_screen = np.flatnonzero(self.on_screen)
+        for i, screen_x, norm_dist, half_width in zip(on_screen.tolist(), self.screen_x[on_screen].tolist(),
+                                                      self.norm_dist[on_screen].tolist(),
+                                                      self.sprite_half_width[on_screen].tolist()):
+            npc = npcs[i]
+            npc.screen_x = screen_x
+            npc.norm_dist = norm_dist
+            npc.sprite_half_width = half_width
+            npc.get_sprite_projection()
@@ -2,15 +2,40 @@
 from sprite_object import *
 from npc import *
 from random import choices, randrange
+from operator import attrgetter
+from spatial_hash import SpatialHash
+from line_of_sight import player_sees_npcs
+from npc_store import NPCStore
+from assets import prefetch
 from utils.resource_path import resource_path
 import pygame as pg
 import sys
 
+# numpy is optional: without it NPCs check line of sight one at a time and the
+# 'arrays' NPC backend falls back to 'objects'
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
 class ObjectHandler:
     def __init__(self, game):
         self.game = game
         self.sprite_list = []
         self.npc_list = []
+        # spatial indexes: NPCs are re-bucketed as they move, sprites never move
+        self.npc_hash = SpatialHash(SPATIAL_CELL_SIZE)
+        self.sprite_hash = SpatialHash(SPATIAL_CELL_SIZE)
+        self.near_npcs = set()
+        # AI level of detail: ticks since the round started and the NPCs that think every tick
+        self.ai_tick = 0
+        self.engaged_npcs = set()
+        self.visible_sprites = []
+        # NPCs that can see the player this frame (read by NPC.run_logic)
+        self.visible_npcs = set()
+        self.combat_started = False
+        # structure-of-arrays NPC update; NPCs then skip the spatial hash and NPC.update
+        self.npc_store = NPCStore(game) if NPC_BACKEND == 'arrays' and np is not None else None
         # resource base folders (kept for reference; use resource_path when needed)
         self.npc_sprite_path = resource_path('resources', 'sprites', 'npc')
         self.static_sprite_path = resource_path('resources', 'sprites', 'static_sprites')
@@ -30,10 +55,19 @@ class ObjectHandler:
         # small region where we don't spawn (player start area)
         self.restricted_area = {(i, j) for i in range(10) for j in range(10)}
 
+        # streaming maps: a flag per chunk of the map file, set once its NPCs have spawned,
+        # and what the live NPCs of chunks paged out were doing, by chunk
+        self.spawned_chunks = None
+        self.chunk_npcs = {}
+
         # spawn NPCs
+        if game.map.streaming:
+            self.spawned_chunks = bytearray(game.map.num_chunks)
+            self.spawn_chunks()
+            return
         self.spawn_npc()
 
-        # sprite map examples (kept mostly as-is, but use resource_path for any explicit paths)
+        # sprite map examples for the built-in map (kept mostly as-is, but use resource_path for any explicit paths)
         add_sprite(AnimatedSprite(game))
         add_sprite(AnimatedSprite(game, pos=(1.5, 1.5)))
         add_sprite(AnimatedSprite(game, pos=(1.5, 7.5)))
@@ -66,7 +100,7 @@ class ObjectHandler:
                 x, y = randrange(self.game.map.cols), randrange(self.game.map.rows)
                 # avoid walls and restricted area
                 attempt = 0
-                while ((x, y) in self.game.map.world_map) or ((x, y) in self.restricted_area):
+                while self.game.map.is_wall(x, y) or ((x, y) in self.restricted_area):
                     x, y = randrange(self.game.map.cols), randrange(self.game.map.rows)
                     attempt += 1
                     if attempt > 200:  # fallback to safe cell near player if map is dense
@@ -103,21 +137,186 @@ class ObjectHandler:
         print(f"[FORCE SPAWN] {type_name} at {pos}")
         return npc_obj
 
+    def spawn_chunks(self):
+        """Streaming maps: NPCs for every resident chunk, as if each had just been paged in."""
+        for key in sorted(self.game.map.chunks):
+            self.spawn_chunk(key)
+
+    def spawn_chunk(self, key):
+        """MAP_CHUNK_NPCS weighted random NPCs on empty tiles of chunk `key`, away from the player."""
+        self.spawned_chunks[self.game.map.chunk_index(key)] = 1
+        player_x, player_y = self.game.player.map_pos
+        tiles = [(x, y) for x, y in self.game.map.open_tiles(key)
+                 if max(abs(x - player_x), abs(y - player_y)) >= 10]
+        for _ in range(MAP_CHUNK_NPCS if tiles else 0):
+            npc_cls = choices(self.npc_types, weights=self.weights, k=1)[0]
+            x, y = tiles[randrange(len(tiles))]
+            self.add_npc(npc_cls(self.game, pos=(x + 0.5, y + 0.5)))
+
+    def update_chunks(self, loaded, evicted):
+        """
+        Streaming maps: NPCs standing in chunks paged out are dropped, keeping their type,
+        position, health and alert state; chunks paged in get those NPCs back, or fresh
+        ones the first time. The dead are not kept, so a cleared chunk stays clear and
+        costs only its spawned flag.
+        """
+        chunk_of = self.game.map.chunk_of
+        resident = self.game.map.chunks
+        leaving = [npc for npc in self.npc_list if chunk_of(npc.x, npc.y) not in resident]
+        if leaving:
+            leaving_set = set(leaving)
+            for npc in leaving:
+                if npc.alive:
+                    state = type(npc).__name__, npc.x, npc.y, npc.health, npc.player_search_trigger
+                    self.chunk_npcs.setdefault(chunk_of(npc.x, npc.y), []).append(state)
+                self.npc_hash.remove(npc)
+            staying = [npc for npc in self.npc_list if npc not in leaving_set]
+            self.npc_list = []
+            self.engaged_npcs -= leaving_set
+            self.near_npcs -= leaving_set
+            self.visible_npcs -= leaving_set
+            if self.npc_store:
+                self.npc_store.clear()
+            for npc in staying:
+                self.npc_list.append(npc)
+                npc.ai_slot = len(self.npc_list) - 1
+                if self.npc_store:
+                    self.npc_store.add(npc)
+
+        cls_map = {c.__name__: c for c in self.npc_types}
+        for key in sorted(loaded):
+            if not self.spawned_chunks[self.game.map.chunk_index(key)]:
+                self.spawn_chunk(key)
+                continue
+            for type_name, x, y, health, search in self.chunk_npcs.pop(key, ()):
+                npc = cls_map[type_name](self.game, pos=(x, y))
+                npc.health = health
+                npc.player_search_trigger = search
+                self.add_npc(npc)
+                if search:
+                    self.engaged_npcs.add(npc)
+
     def check_win(self):
+        # a streamed map spawns NPCs as it is explored, so there is no last one to kill
+        if self.game.map.streaming:
+            return
         if not len(self.npc_positions):
             self.game.object_renderer.win()
-            pg.display.flip()
-            pg.time.delay(1500)
-            self.game.new_game()
+            self.game.flip_and_wait(1500)
+            self.game.restart()
+
+    def reset(self):
+        """New round on the same map: fresh NPCs; the static sprites are kept."""
+        for npc in self.npc_list:
+            self.npc_hash.remove(npc)
+        self.npc_list = []
+        self.npc_positions = {}
+        self.near_npcs = set()
+        self.visible_npcs = set()
+        self.ai_tick = 0
+        self.engaged_npcs = set()
+        self.combat_started = False
+        if self.npc_store:
+            self.npc_store.clear()
+        if self.game.map.streaming:
+            self.spawned_chunks = bytearray(len(self.spawned_chunks))
+            self.chunk_npcs = {}
+            self.spawn_chunks()
+            return
+        self.spawn_npc()
 
     def update(self):
-        self.npc_positions = {npc.map_pos for npc in self.npc_list if npc.alive}
-        [sprite.update() for sprite in self.sprite_list]
-        [npc.update() for npc in self.npc_list]
+        store = self.npc_store
+        if store:
+            self.npc_positions = store.positions()
+        else:
+            self.npc_positions = {npc.map_pos for npc in self.npc_list if npc.alive}
+        self.game.pathfinding.update(self.npc_positions)
+
+        # only sprites in the view cone are projected; only NPCs near the player test line of sight
+        player = self.game.player
+        self.visible_sprites = self.sprite_hash.query_cone(player.x, player.y, player.angle, HALF_FOV, MAX_DEPTH)
+        if not store:
+            thinking = self.schedule_npcs()
+            radius_sq = NPC_ACTIVE_RADIUS ** 2
+            self.near_npcs = {npc for npc in thinking
+                              if npc.alive and (npc.x - player.x) ** 2 + (npc.y - player.y) ** 2 <= radius_sq}
+            self.update_line_of_sight()
+
+        [sprite.update() for sprite in self.visible_sprites]
+        if store:
+            store.update()
+        else:
+            [npc.update() for npc in thinking]
+            if AI_LOD:
+                self.engaged_npcs = {npc for npc in thinking if npc.engaged}
+        self.ai_tick += 1
         self.check_win()
 
+    def project_sprites(self):
+        """Render pass: queue every on-screen sprite and NPC as seen from the current camera."""
+        [sprite.project() for sprite in self.visible_sprites]
+        if self.npc_store:
+            self.npc_store.project()
+        else:
+            [npc.project() for npc in self.npc_list]
+
+    def schedule_npcs(self):
+        """
+        The NPCs that think this tick, in npc_list order. Besides the engaged ones, an idle
+        NPC thinks on the ticks where (ai_tick + ai_slot) is a multiple of its interval, so
+        idle cost grows with NPCs near the player, not the total. A shot wakes every NPC
+        within NPC_ACTIVE_RADIUS, since any of them may be under the crosshair.
+        """
+        if not AI_LOD:
+            return self.npc_list
+        player = self.game.player
+        tick = self.ai_tick
+        thinking = set(self.engaged_npcs)
+        close = self.npc_hash.query_radius(player.x, player.y, AI_NEAR_RADIUS)
+        thinking.update(npc for npc in close if npc.alive and (tick + npc.ai_slot) % AI_NEAR_INTERVAL == 0)
+        close = set(close)
+        thinking.update(npc for npc in self.npc_list[-tick % AI_FAR_INTERVAL::AI_FAR_INTERVAL]
+                        if npc.alive and npc not in close)
+        if player.shot:
+            thinking.update(npc for npc in self.npc_hash.query_radius(player.x, player.y, NPC_ACTIVE_RADIUS)
+                            if npc.alive)
+        return sorted(thinking, key=attrgetter('ai_slot'))
+
+    def start_combat(self):
+        """The first time an NPC spots the player, load combat-only assets in the background."""
+        if self.combat_started:
+            return
+        self.combat_started = True
+        handles = {images.handle for npc in self.npc_list
+                   for images in (npc.attack_images, npc.pain_images, npc.death_images)}
+        renderer = self.game.object_renderer
+        prefetch(*handles, renderer.game_over_image, renderer.win_image)
+
+    def update_line_of_sight(self):
+        """Player-to-NPC line of sight for near_npcs (nearby, living, thinking), in one numpy pass when available."""
+        npcs = list(self.near_npcs)
+        grid = self.game.map.grid_array
+        if np is None or grid is None or not npcs:
+            self.visible_npcs = {npc for npc in npcs if npc.ray_cast_player_npc()}
+            return
+
+        # in grid coordinates (see StreamingMap)
+        origin_x, origin_y = self.game.map.origin
+        npc_x = np.array([npc.x for npc in npcs]) - origin_x
+        npc_y = np.array([npc.y for npc in npcs]) - origin_y
+        player = self.game.player
+        visible = player_sees_npcs(grid, (player.x - origin_x, player.y - origin_y), npc_x, npc_y)
+        self.visible_npcs = {npc for npc, sees in zip(npcs, visible.tolist()) if sees}
+
     def add_npc(self, npc):
+        npc.ai_slot = len(self.npc_list)
         self.npc_list.append(npc)
+        if self.npc_store:
+            self.npc_store.add(npc)
+        else:
+            self.npc_hash.insert(npc)
 
     def add_sprite(self, sprite):
         self.sprite_list.append(sprite)
+        self.sprite_hash.insert(sprite)
@@ -1,7 +1,19 @@
 # object_render.py
+import math
 import pygame as pg
 from settings import *
+from assets import lazy, load_scaled, resolve
 from utils.resource_path import resource_path
+from wall_renderer import WallRenderer
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+# sky pixels per radian of turn: the old 4.5 px per unit of mouse motion at 60 FPS
+SKY_SCROLL = 4.5 / (MOUSE_SENSITIVITY * 1000 / 60)
 
 
 class ObjectRenderer:
@@ -9,8 +21,12 @@ class ObjectRenderer:
         self.game = game
         self.screen = game.screen
         self.wall_textures = self.load_wall_textures()
+        self.wall_renderer = None
+        if WALL_RENDERER == 'surfarray' and np is not None:
+            self.wall_renderer = WallRenderer(game, self.wall_textures)
         self.sky_image = self.get_texture(resource_path('resources', 'textures', 'sky.png'), (WIDTH, HALF_HEIGHT))
         self.sky_offset = 0
+        self.sky_angle = None
         self.blood_screen = self.get_texture(resource_path('resources', 'textures', 'blood_screen.png'), RES)
         self.digit_size = 90
         # digits 0..10 (adjust if your project only has 0..9)
@@ -18,8 +34,9 @@ class ObjectRenderer:
                                              (self.digit_size, self.digit_size))
                              for i in range(11)]
         self.digits = dict(zip(map(str, range(11)), self.digit_images))
-        self.game_over_image = self.get_texture(resource_path('resources', 'textures', 'gameover.jpg'), RES)
-        self.win_image = self.get_texture(resource_path('resources', 'textures', 'win.png'), RES)
+        # end screens are not needed for the first frame: loaded on first use or prefetched
+        self.game_over_image = self.get_lazy_texture(resource_path('resources', 'textures', 'gameover.jpg'), RES)
+        self.win_image = self.get_lazy_texture(resource_path('resources', 'textures', 'win.png'), RES)
 
     def draw(self):
         self.draw_background()
@@ -27,10 +44,10 @@ class ObjectRenderer:
         self.draw_player_health()
 
     def win(self):
-        self.screen.blit(self.win_image, (0, 0))
+        self.screen.blit(self.win_image.get(), (0, 0))
 
     def game_over(self):
-        self.screen.blit(self.game_over_image, (0, 0))
+        self.screen.blit(self.game_over_image.get(), (0, 0))
 
     def draw_player_health(self):
         health = str(self.game.player.health)
@@ -47,7 +64,12 @@ class ObjectRenderer:
         Draw sky with horizontal parallax and small vertical pitch shift.
         pitch_factor determines how many pixels full pitch (1.0) moves the camera.
         """
-        self.sky_offset = (self.sky_offset + 4.5 * self.game.player.rel) % WIDTH
+        # scroll the sky with how far the camera turned since the last frame
+        angle = self.game.player.angle
+        if self.sky_angle is not None:
+            turn = (angle - self.sky_angle + math.pi) % math.tau - math.pi
+            self.sky_offset = (self.sky_offset + SKY_SCROLL * turn) % WIDTH
+        self.sky_angle = angle
 
         # tuned to avoid collapsing layout
         pitch_factor = 80
@@ -64,14 +86,72 @@ class ObjectRenderer:
         pg.draw.rect(self.screen, FLOOR_COLOR, (0, horizon_y, WIDTH, HEIGHT - horizon_y))
 
     def render_game_objects(self):
+        # walls first, once, in screen order
+        if self.wall_renderer is None:
+            self.screen.blits(self.game.raycasting.wall_columns, doreturn=False)
+        else:
+            self.wall_renderer.draw()
+
+        # only sprites need sorting; each one is clipped against the wall depth buffer
         list_objects = sorted(self.game.raycasting.objects_to_render, key=lambda t: t[0], reverse=True)
         for depth, image, pos in list_objects:
+            self.draw_sprite(image, pos, depth)
+
+    def draw_sprite(self, image, pos, depth):
+        """Blit only the screen columns of a sprite that are closer than the wall behind them."""
+        depth_buffer = self.game.raycasting.depth_buffer
+        scale = self.game.raycasting.scale
+        x = pos[0]
+        width = image.get_width()
+        first_ray = max(0, int(x // scale))
+        last_ray = min(len(depth_buffer), int((x + width) // scale) + 1)
+        if first_ray >= last_ray:
+            return
+        if np is None or not isinstance(depth_buffer, np.ndarray):
+            self.draw_sprite_runs(image, pos, depth, first_ray, last_ray)
+            return
+
+        visible = depth < depth_buffer[first_ray:last_ray]
+        if visible.all():
             self.screen.blit(image, pos)
+            return
+        if not visible.any():
+            return
+
+        # blit each run of consecutive visible columns as one strip of the sprite
+        edges = np.flatnonzero(np.diff(np.concatenate(([False], visible, [False])).astype(np.int8)))
+        for start, end in zip(edges[::2].tolist(), edges[1::2].tolist()):
+            self.blit_strip(image, pos, (first_ray + start) * scale, (first_ray + end) * scale)
+
+    def draw_sprite_runs(self, image, pos, depth, first_ray, last_ray):
+        """draw_sprite for the list depth buffer of the python engine, one column at a time."""
+        depth_buffer = self.game.raycasting.depth_buffer
+        scale = self.game.raycasting.scale
+        run_start = None
+        for ray in range(first_ray, last_ray + 1):
+            if ray < last_ray and depth < depth_buffer[ray]:
+                if run_start is None:
+                    run_start = ray
+            elif run_start is not None:
+                self.blit_strip(image, pos, run_start * scale, ray * scale)
+                run_start = None
+
+    def blit_strip(self, image, pos, left, right):
+        """Blit the part of a sprite at `pos` between screen x `left` and `right`."""
+        x, y = pos
+        left = max(x, left)
+        right = min(x + image.get_width(), right)
+        if right > left:
+            self.screen.blit(image, (left, y), (left - x, 0, right - left, image.get_height()))
 
     @staticmethod
     def get_texture(path, res=(TEXTURE_SIZE, TEXTURE_SIZE)):
-        texture = pg.image.load(path).convert_alpha()
-        return pg.transform.scale(texture, res)
+        return load_scaled(path, res)
+
+    @classmethod
+    def get_lazy_texture(cls, path, res=(TEXTURE_SIZE, TEXTURE_SIZE)):
+        """AssetHandle for get_texture(path, res)."""
+        return lazy(('texture', resolve(path), res), lambda: cls.get_texture(path, res))
 
     def load_wall_textures(self):
         return {
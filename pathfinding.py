@@ -1,26 +1,148 @@
+import math
 from collections import deque
-from functools import lru_cache
+from heapq import heappop, heappush
+from settings import MAP_CHUNK_RADIUS, PATH_CACHE_SIZE, PATHFINDING_ENGINE
+from utils.lru import LRUCache
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+DIAGONAL_COST = math.sqrt(2)
 
 
 class PathFinding:
     def __init__(self, game):
         self.game = game
-        self.map = game.map.mini_map
         self.ways = [-1, 0], [0, -1], [1, 0], [0, 1], [-1, -1], [1, -1], [1, 1], [-1, 1]
         self.graph = {}
+        # streaming maps: chunk -> (graph entries of its open tiles, the ones on its edge),
+        # prepared from the map file ahead of the window (see prepare_chunk)
+        self.chunk_links = {}
         self.get_graph()
 
-    @lru_cache
+        # (start, goal) -> next step; only valid for the goal and NPC occupancy it was built with
+        self.path_cache = LRUCache(PATH_CACHE_SIZE)
+        self.cache_goal = None
+        self.cache_npc_positions = frozenset()
+
+        # flow field toward the player: tile -> distance and tile -> next step
+        self.engine = PATHFINDING_ENGINE
+        self.flow_goal = None
+        self.flow_dist = {}
+        self.flow_next = {}
+        # the same next steps as two (rows, cols) arrays, for get_paths (numpy only)
+        self.flow_grid = None
+        self.search = self.astar if self.engine == 'astar' else self.bfs
+
+    def reset(self):
+        """Forget cached paths and the flow field; the graph only depends on the map and is kept."""
+        self.path_cache.clear()
+        self.cache_goal = None
+        self.cache_npc_positions = frozenset()
+        self.flow_goal = None
+        self.flow_dist = {}
+        self.flow_next = {}
+        self.flow_grid = None
+
+    def update(self, npc_positions):
+        """Drop cached paths when the player enters a new tile or an NPC changes tile."""
+        goal = self.game.player.map_pos
+        if self.engine == 'flow_field':
+            if goal != self.flow_goal:
+                self.get_flow_field(goal)
+            return
+        if goal != self.cache_goal or npc_positions != self.cache_npc_positions:
+            self.path_cache.clear()
+            self.cache_goal = goal
+            self.cache_npc_positions = frozenset(npc_positions)
+
     def get_path(self, start, goal):
-        self.visited = self.bfs(start, goal, self.graph)
+        if self.engine == 'flow_field':
+            return self.get_flow_step(start, goal)
+
+        key = start, goal
+        next_step = self.path_cache.get(key)
+        if next_step is not None:
+            return next_step
+
+        self.visited = self.search(start, goal, self.graph)
         path = [goal]
         step = self.visited.get(goal, start)
 
         while step and step != start:
             path.append(step)
             step = self.visited[step]
+        self.path_cache.put(key, path[-1])
         return path[-1]
 
+    def get_flow_field(self, goal):
+        """Reverse BFS from `goal` over the whole graph, shared by every NPC until the goal moves."""
+        self.flow_goal = goal
+        self.flow_dist = dist = {goal: 0}
+        self.flow_next = next_step = {goal: goal}
+        queue = deque([goal])
+
+        while queue:
+            cur_node = queue.popleft()
+            for next_node in self.graph.get(cur_node, ()):
+                if next_node not in dist:
+                    dist[next_node] = dist[cur_node] + 1
+                    next_step[next_node] = cur_node
+                    queue.append(next_node)
+
+        if np is not None:
+            # over the map's grid (indexed from its origin); unreachable tiles step onto
+            # themselves, as in get_flow_step
+            game_map = self.game.map
+            rows, cols = game_map.grid_rows, game_map.grid_cols
+            origin_x, origin_y = game_map.origin
+            grid_y, grid_x = np.indices((rows, cols))
+            self.flow_grid = grid = np.stack((grid_x + origin_x, grid_y + origin_y))
+            nodes = [node for node in next_step
+                     if 0 <= node[0] - origin_x < cols and 0 <= node[1] - origin_y < rows]
+            if nodes:
+                node_x, node_y = np.array(nodes).T
+                step_x, step_y = np.array([next_step[node] for node in nodes]).T
+                grid[0, node_y - origin_y, node_x - origin_x] = step_x
+                grid[1, node_y - origin_y, node_x - origin_x] = step_y
+
+    def get_paths(self, tile_x, tile_y, goal):
+        """get_path for numpy arrays of start tiles; returns the next tiles as (x array, y array)."""
+        starts = list(zip(tile_x.tolist(), tile_y.tolist()))
+        if self.engine != 'flow_field':
+            steps = [self.get_path(start, goal) for start in starts]
+            return np.array([x for x, _ in steps], dtype=int), np.array([y for _, y in steps], dtype=int)
+
+        if goal != self.flow_goal:
+            self.get_flow_field(goal)
+        origin_x, origin_y = self.game.map.origin
+        next_x = self.flow_grid[0, tile_y - origin_y, tile_x - origin_x]
+        next_y = self.flow_grid[1, tile_y - origin_y, tile_x - origin_x]
+        # only steps onto an occupied tile need get_flow_step's search for a free neighbour
+        npc_positions = self.game.object_handler.npc_positions
+        for i, step in enumerate(zip(next_x.tolist(), next_y.tolist())):
+            if step in npc_positions:
+                next_x[i], next_y[i] = self.get_flow_step(starts[i], goal)
+        return next_x, next_y
+
+    def get_flow_step(self, start, goal):
+        if goal != self.flow_goal:
+            self.get_flow_field(goal)
+        step = self.flow_next.get(start)
+        if step is None:
+            return start
+
+        # step is taken by another NPC: look for an equally good free neighbour
+        npc_positions = self.game.object_handler.npc_positions
+        if step in npc_positions:
+            dist = self.flow_dist[step]
+            for next_node in self.graph.get(start, ()):
+                if next_node not in npc_positions and self.flow_dist.get(next_node) == dist:
+                    return next_node
+        return step
+
     def bfs(self, start, goal, graph):
         queue = deque([start])
         visited = {start: None}
@@ -29,7 +151,8 @@ class PathFinding:
             cur_node = queue.popleft()
             if cur_node == goal:
                 break
-            next_nodes = graph[cur_node]
+            # a start tile inside a wall (spawn fallback) has no graph entry
+            next_nodes = graph.get(cur_node, ())
 
             for next_node in next_nodes:
                 if next_node not in visited and next_node not in self.game.object_handler.npc_positions:
@@ -37,11 +160,134 @@ class PathFinding:
                     visited[next_node] = cur_node
         return visited
 
+    def astar(self, start, goal, graph):
+        """
+        A* with an octile-distance heuristic. Diagonal steps cost sqrt(2) and may not
+        cut a wall corner. Returns parent links in the same form as bfs.
+        """
+        is_wall = self.game.map.is_wall
+        npc_positions = self.game.object_handler.npc_positions
+        goal_x, goal_y = goal
+        visited = {start: None}
+        cost = {start: 0}
+        closed = set()
+        open_set = [(0, start)]
+
+        while open_set:
+            _, cur_node = heappop(open_set)
+            if cur_node == goal:
+                break
+            if cur_node in closed:
+                continue
+            closed.add(cur_node)
+            x, y = cur_node
+
+            for next_node in graph.get(cur_node, ()):
+                if next_node in npc_positions:
+                    continue
+                dx, dy = next_node[0] - x, next_node[1] - y
+                if dx and dy:
+                    # no corner cutting: both orthogonal neighbours must be open
+                    if is_wall(x + dx, y) or is_wall(x, y + dy):
+                        continue
+                    step = DIAGONAL_COST
+                else:
+                    step = 1
+                new_cost = cost[cur_node] + step
+                if new_cost < cost.get(next_node, math.inf):
+                    cost[next_node] = new_cost
+                    visited[next_node] = cur_node
+                    h_x, h_y = abs(goal_x - next_node[0]), abs(goal_y - next_node[1])
+                    heuristic = max(h_x, h_y) + (DIAGONAL_COST - 1) * min(h_x, h_y)
+                    heappush(open_set, (new_cost + heuristic, next_node))
+        return visited
+
     def get_next_nodes(self, x, y):
-        return [(x + dx, y + dy) for dx, dy in self.ways if (x + dx, y + dy) not in self.game.map.world_map]
+        is_wall = self.game.map.is_wall
+        return [(x + dx, y + dy) for dx, dy in self.ways if not is_wall(x + dx, y + dy)]
 
     def get_graph(self):
-        for y, row in enumerate(self.map):
-            for x, col in enumerate(row):
-                if not col:
-                    self.graph[(x, y)] = self.graph.get((x, y), []) + self.get_next_nodes(x, y)
\ No newline at end of file
+        game_map = self.game.map
+        if game_map.streaming:
+            self.link_chunks(game_map.chunks, set())
+            return
+        tiles = game_map.open_tiles()
+        self.link_tiles(tiles, set(tiles))
+
+    def link_tiles(self, tiles, open_tiles):
+        """Graph entries for `tiles`, their neighbours looked up in the set of every open tile."""
+        ways = self.ways
+        for x, y in tiles:
+            self.graph[(x, y)] = [(x + dx, y + dy) for dx, dy in ways if (x + dx, y + dy) in open_tiles]
+
+    def prepare_chunk(self, key):
+        """
+        Streaming maps: graph entries for the open tiles of chunk `key`, read from the map
+        file so they do not depend on the window. Tiles with neighbours in another chunk are
+        also listed by that chunk's direction: those neighbours only count while it is resident.
+        """
+        game_map = self.game.map
+        size = game_map.chunk_size
+        side = size + 2
+        block = game_map.chunk_block(key)
+        steps = [(dx, dy, dy * side + dx) for dx, dy in self.ways]
+        x0, y0 = key[0] * size, key[1] * size
+        links, crossing = {}, {}
+        for j in range(size):
+            for i in range(size):
+                index = (j + 1) * side + i + 1
+                if block[index]:
+                    continue
+                x, y = x0 + i, y0 + j
+                links[(x, y)] = [(x + dx, y + dy) for dx, dy, step in steps if not block[index + step]]
+                if i in (0, size - 1) or j in (0, size - 1):
+                    for direction in {((i + dx) // size, (j + dy) // size) for dx, dy, step in steps
+                                      if not block[index + step]} - {(0, 0)}:
+                        crossing.setdefault(direction, []).append((x, y))
+        self.chunk_links[key] = links, crossing
+        return links, crossing
+
+    def get_chunk_links(self, key):
+        return self.chunk_links.get(key) or self.prepare_chunk(key)
+
+    def link_chunks(self, loaded, evicted):
+        """Add the graph of chunks paged in, drop that of chunks paged out, and fix up the seams."""
+        game_map = self.game.map
+        size = game_map.chunk_size
+        resident = game_map.chunks
+        graph = self.graph
+        for key in evicted:
+            for tile in self.get_chunk_links(key)[0]:
+                graph.pop(tile, None)
+        for key in loaded:
+            graph.update(self.get_chunk_links(key)[0])
+
+        # edge tiles gain or lose their neighbours across the seams: in chunks paged in, those
+        # facing chunks that are not resident; elsewhere, those facing a chunk paged in or out
+        changed = loaded | evicted
+        seam = {(cx + i, cy + j) for cx, cy in changed for j in (-1, 0, 1) for i in (-1, 0, 1)}
+        for cx, cy in seam & resident:
+            links, crossing = self.get_chunk_links((cx, cy))
+            fresh = (cx, cy) in loaded
+            tiles = set()
+            for (dx, dy), crossing_tiles in crossing.items():
+                neighbour = cx + dx, cy + dy
+                if (neighbour not in resident) if fresh else (neighbour in changed):
+                    tiles.update(crossing_tiles)
+            for tile in tiles:
+                graph[tile] = [(x, y) for x, y in links[tile] if (x // size, y // size) in resident]
+
+        # prepared chunks far behind the window will not be needed soon, except the
+        # spawn window's, which every new round pages back in
+        center_x, center_y = game_map.center
+        reach = MAP_CHUNK_RADIUS + 2
+        for key in [key for key in self.chunk_links
+                    if max(abs(key[0] - center_x), abs(key[1] - center_y)) > reach
+                    and key not in game_map.spawn_chunks]:
+            del self.chunk_links[key]
+
+    def update_chunks(self, loaded, evicted):
+        """Streaming maps: the window moved (see link_chunks)."""
+        self.link_chunks(loaded, evicted)
+        # cached paths and the flow field may lead through chunks that are gone
+        self.reset()
@@ -1,5 +1,6 @@
 # player.py
 from settings import *
+from contextlib import contextmanager
 import pygame as pg
 import math
 
@@ -7,16 +8,10 @@ import math
 class Player:
     def __init__(self, game):
         self.game = game
-        self.x, self.y = PLAYER_POS
-        self.angle = PLAYER_ANGLE
-        self.shot = False
-        self.health = PLAYER_MAX_HEALTH
-        self.rel = 0                       # horizontal mouse movement (used for sky shift)
         self.health_recovery_delay = 700
-        self.time_prev = pg.time.get_ticks()
+        self.reset()
 
         # vertical look (camera pitch)
-        self.pitch = 0.0
         self.MAX_PITCH = 0.6               # reduced max pitch for smaller visual shift
         self.MOUSE_SENSITIVITY_Y = 0.00018 # reduced vertical sensitivity
 
@@ -26,22 +21,33 @@ class Player:
         # diagonal movement correction
         self.diag_move_corr = 1 / math.sqrt(2)
 
+    def reset(self):
+        """Start-of-round state (Game.reset_level keeps the same Player object)."""
+        self.x, self.y = self.game.map.spawn
+        self.angle = PLAYER_ANGLE
+        # pose at the start of the current simulation step (for interpolated rendering)
+        self.prev_x, self.prev_y, self.prev_angle = self.x, self.y, self.angle
+        self.shot = False
+        self.health = PLAYER_MAX_HEALTH
+        self.rel = 0                       # horizontal mouse movement (used for sky shift)
+        self.time_prev = self.game.get_ticks()
+        self.pitch = 0.0
+
     def recover_health(self):
         if self.check_health_recovery_delay() and self.health < PLAYER_MAX_HEALTH:
             self.health += 1
 
     def check_health_recovery_delay(self):
-        time_now = pg.time.get_ticks()
+        time_now = self.game.get_ticks()
         if time_now - self.time_prev > self.health_recovery_delay:
             self.time_prev = time_now
             return True
 
     def check_game_over(self):
-        if self.health < 1:
+        if self.health < 1 and not self.game.restart_pending:
             self.game.object_renderer.game_over()
-            pg.display.flip()
-            pg.time.delay(1500)
-            self.game.new_game()
+            self.game.flip_and_wait(1500)
+            self.game.restart()
 
     def get_damage(self, damage):
         # Apply player's damage resistance
@@ -77,7 +83,7 @@ class Player:
         speed_sin = speed * sin_a
         speed_cos = speed * cos_a
 
-        keys = pg.key.get_pressed()
+        keys = self.game.input.get_pressed()
         num_key_pressed = -1
         if keys[pg.K_w]:
             num_key_pressed += 1
@@ -107,7 +113,7 @@ class Player:
         self.angle %= math.tau
 
     def check_wall(self, x, y):
-        return (x, y) not in self.game.map.world_map
+        return not self.game.map.is_wall(x, y)
 
     def check_wall_collision(self, dx, dy):
         scale = PLAYER_SIZE_SCALE / self.game.delta_time
@@ -127,11 +133,11 @@ class Player:
         Handles horizontal rotation and vertical look (pitch).
         Mouse up -> look up (non-inverted).
         """
-        mx, my = pg.mouse.get_pos()
+        mx, my = self.game.input.get_mouse_pos()
         if mx < MOUSE_BORDER_LEFT or mx > MOUSE_BORDER_RIGHT:
-            pg.mouse.set_pos([HALF_WIDTH, HALF_HEIGHT])
+            self.game.input.set_mouse_pos([HALF_WIDTH, HALF_HEIGHT])
 
-        rel_x, rel_y = pg.mouse.get_rel()
+        rel_x, rel_y = self.game.input.get_mouse_rel()
 
         # Horizontal rotation (unchanged)
         self.rel = max(-MOUSE_MAX_REL, min(MOUSE_MAX_REL, rel_x))
@@ -148,7 +154,21 @@ class Player:
         if self.pitch < -self.MAX_PITCH:
             self.pitch = -self.MAX_PITCH
 
+    @contextmanager
+    def interpolated(self, alpha):
+        """Temporarily place the camera `alpha` of the way from the previous pose to the current one."""
+        x, y, angle = self.x, self.y, self.angle
+        turn = (angle - self.prev_angle + math.pi) % math.tau - math.pi
+        self.x = self.prev_x + (x - self.prev_x) * alpha
+        self.y = self.prev_y + (y - self.prev_y) * alpha
+        self.angle = self.prev_angle + turn * alpha
+        try:
+            yield
+        finally:
+            self.x, self.y, self.angle = x, y, angle
+
     def update(self):
+        self.prev_x, self.prev_y, self.prev_angle = self.x, self.y, self.angle
         self.movement()
         self.mouse_control()
         self.recover_health()
@@ -0,0 +1,95 @@
+# profiler.py
+import csv
+import json
+import time
+from collections import deque
+from contextlib import contextmanager
+import pygame as pg
+from settings import PROFILER_WINDOW, PROFILER_HISTORY
+
+
+class FrameProfiler:
+    """
+    Times named stages of each frame (see Game.update / Game.draw).
+    Keeps a rolling window per stage for p50/p95/p99, a bounded per-frame history
+    for CSV/JSON export, and can draw the percentiles as an on-screen overlay.
+    """
+
+    def __init__(self, window=PROFILER_WINDOW, history=PROFILER_HISTORY):
+        self.window = window
+        self.stages = []
+        self.samples = {}
+        self.history = deque(maxlen=history)
+        self.current = {}
+        self.frame_start = time.perf_counter()
+        self.frame = 0
+        self.show_overlay = False
+        self.font = None
+
+    def begin(self):
+        """Start the first frame's clock now, so startup time is not counted as a frame."""
+        self.frame_start = time.perf_counter()
+        self.current = {}
+
+    @contextmanager
+    def probe(self, stage):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.current[stage] = self.current.get(stage, 0.0) + (time.perf_counter() - start) * 1000
+
+    def end_frame(self):
+        """Close the current frame: its total time plus every stage timed since the last call."""
+        now = time.perf_counter()
+        self.current['total'] = (now - self.frame_start) * 1000
+        self.frame_start = now
+        for stage, ms in self.current.items():
+            if stage not in self.samples:
+                self.stages.append(stage)
+                self.samples[stage] = deque(maxlen=self.window)
+            self.samples[stage].append(ms)
+        self.history.append({'frame': self.frame, **{stage: round(ms, 4) for stage, ms in self.current.items()}})
+        self.frame += 1
+        self.current = {}
+
+    def percentiles(self, stage, points=(50, 95, 99)):
+        values = sorted(self.samples.get(stage, ()))
+        if not values:
+            return tuple(0.0 for _ in points)
+        return tuple(values[min(len(values) - 1, len(values) * p // 100)] for p in points)
+
+    def summary(self):
+        return {stage: dict(zip(('p50', 'p95', 'p99'), self.percentiles(stage))) for stage in self.stages}
+
+    def toggle_overlay(self):
+        self.show_overlay = not self.show_overlay
+
+    def draw(self, screen):
+        if self.font is None:
+            self.font = pg.font.Font(None, 24)
+        rows = [('stage', 'p50', 'p95', 'p99 ms')]
+        for stage in self.stages:
+            rows.append((stage, *(f'{ms:.2f}' for ms in self.percentiles(stage))))
+
+        # one cell per column at a fixed x, so numbers line up with any font
+        column_x = (8, 120, 190, 260)
+        line_height = self.font.get_linesize()
+        panel = pg.Surface((340, line_height * len(rows) + 10), pg.SRCALPHA)
+        panel.fill((0, 0, 0, 170))
+        for i, row in enumerate(rows):
+            for x, cell in zip(column_x, row):
+                panel.blit(self.font.render(cell, True, 'white'), (x, 5 + i * line_height))
+        screen.blit(panel, (screen.get_width() - panel.get_width() - 10, 10))
+
+    def export(self, path):
+        """Write the per-frame history as .json, or as .csv for any other extension."""
+        columns = ['frame', *self.stages]
+        if path.lower().endswith('.json'):
+            with open(path, 'w') as f:
+                json.dump({'summary': self.summary(), 'frames': list(self.history)}, f)
+            return
+        with open(path, 'w', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=columns, restval='')
+            writer.writeheader()
+            writer.writerows(self.history)
@@ -1,46 +1,180 @@
 
 import pygame as pg
+import sys
 import math
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from settings import *
+from utils.lru import LRUCache
+
+# numpy is optional: without it only the per-ray python engine is available
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# worker pool shared by every RayCasting (new_game rebuilds RayCasting, not the threads)
+_executor = None
+
+
+def get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(RAYCAST_THREADS, thread_name_prefix='raycast')
+    return _executor
+
+
+def gil_enabled():
+    """False on a free-threaded CPython build running without the GIL."""
+    return getattr(sys, '_is_gil_enabled', lambda: True)()
 
 
 class RayCasting:
     def __init__(self, game):
         self.game = game
         self.ray_casting_result = []
+        # numpy copies of the result: (depth, proj_height, texture, offset) arrays
+        self.ray_arrays = None
+        # per-ray wall depth (z-buffer), used to clip sprites column by column
+        # (an array with numpy, a list without)
+        self.depth_buffer = []
+        # wall strips as (image, pos) in screen order, and depth-tagged sprites to sort
+        self.wall_columns = []
         self.objects_to_render = []
         self.textures = self.game.object_renderer.wall_textures
+        # (texture, texture column, projected height) -> scaled wall strip
+        self.column_cache = LRUCache(WALL_COLUMN_CACHE_SIZE)
+        self.cache_lock = threading.Lock()
+
+        # pick the raycasting engine; fall back to the python loop if numpy or the grid is missing
+        self.engine = RAYCAST_ENGINE
+        if np is None or self.game.map.grid_array is None:
+            self.engine = 'python'
+        if self.engine == 'numpy':
+            self.depth_steps = np.arange(MAX_DEPTH)
+        # with RAYCAST_THREADS > 1 the screen is cast in that many strips of rays on a
+        # thread pool; the python engine only gains from it without the GIL
+        self.executor = None
+        if RAYCAST_THREADS > 1:
+            self.executor = get_executor()
+        self.thread_python = self.executor is not None and not gil_enabled()
+        # screen pixels per ray; see set_column_width
+        self.scale = None
+        self.set_column_width(SCALE)
+
+        # with the surfarray renderer walls go straight to the framebuffer
+        self.draw_wall_columns = self.game.object_renderer.wall_renderer is None
+
+    def set_column_width(self, scale):
+        """
+        Cast one ray per `scale` screen pixels (SCALE by default; wider under dynamic
+        resolution). Rays keep the angles of the screen columns they start at.
+        """
+        if scale == self.scale:
+            return
+        self.scale = scale
+        self.num_rays = -(-WIDTH // scale)
+        self.delta_angle = FOV * scale / WIDTH
+        # cached strips are `scale` pixels wide
+        self.column_cache.clear()
+        if self.engine == 'numpy':
+            self.ray_ids = np.arange(self.num_rays)
+        # (first, last) ray ranges, one per worker thread
+        strips = max(1, RAYCAST_THREADS)
+        self.strips = [(self.num_rays * i // strips, self.num_rays * (i + 1) // strips) for i in range(strips)]
+
+    def map_strips(self, func):
+        """func(first, last) for every strip, on the thread pool; results in screen order."""
+        if self.executor is None:
+            return [func(first, last) for first, last in self.strips]
+        return list(self.executor.map(func, *zip(*self.strips)))
+
+    def get_wall_column(self, texture, offset, proj_height):
+        """Scaled wall strip for one ray, reused from the column cache when possible."""
+        # quantize: strips are `scale` texels wide, heights to whole pixels
+        scale = self.scale
+        column = int(offset * (TEXTURE_SIZE - scale)) // scale * scale
+        height = int(proj_height)
+        key = (texture, column, height)
+        with self.cache_lock:
+            wall_column = self.column_cache.get(key)
+        if wall_column is not None:
+            return wall_column
+
+        if height < HEIGHT:
+            wall_column = self.textures[texture].subsurface(column, 0, scale, TEXTURE_SIZE)
+            wall_column = pg.transform.scale(wall_column, (scale, height))
+        else:
+            texture_height = TEXTURE_SIZE * HEIGHT / height
+            wall_column = self.textures[texture].subsurface(
+                column, HALF_TEXTURE_SIZE - texture_height // 2, scale, texture_height
+            )
+            wall_column = pg.transform.scale(wall_column, (scale, HEIGHT))
+        # another strip may have scaled the same strip meanwhile; either copy will do
+        with self.cache_lock:
+            self.column_cache.put(key, wall_column)
+        return wall_column
 
     def get_objects_to_render(self):
+        # sprites append themselves here later in the frame
         self.objects_to_render = []
-        for ray, values in enumerate(self.ray_casting_result):
-            depth, proj_height, texture, offset = values
+        self.wall_columns = []
+        if not self.draw_wall_columns:
+            return
+        if self.executor is None:
+            self.wall_columns = self.get_wall_columns(0, self.num_rays)
+        else:
+            # pg.transform.scale releases the GIL, so cache misses scale in parallel
+            for strip in self.map_strips(self.get_wall_columns):
+                self.wall_columns.extend(strip)
+
+    def get_wall_columns(self, first, last):
+        """(image, pos) wall strips for rays first..last-1."""
+        scale = self.scale
+        wall_columns = []
+        for ray in range(first, last):
+            depth, proj_height, texture, offset = self.ray_casting_result[ray]
 
+            wall_column = self.get_wall_column(texture, offset, proj_height)
             if proj_height < HEIGHT:
-                wall_column = self.textures[texture].subsurface(
-                    offset * (TEXTURE_SIZE - SCALE), 0, SCALE, TEXTURE_SIZE
-                )
-                wall_column = pg.transform.scale(wall_column, (SCALE, proj_height))
-                wall_pos = (ray * SCALE, HALF_HEIGHT - proj_height // 2)
+                wall_pos = (ray * scale, HALF_HEIGHT - proj_height // 2)
             else:
-                texture_height = TEXTURE_SIZE * HEIGHT / proj_height
-                wall_column = self.textures[texture].subsurface(
-                    offset * (TEXTURE_SIZE - SCALE), HALF_TEXTURE_SIZE - texture_height // 2,
-                    SCALE, texture_height
-                )
-                wall_column = pg.transform.scale(wall_column, (SCALE, HEIGHT))
-                wall_pos = (ray * SCALE, 0)
+                wall_pos = (ray * scale, 0)
 
-            self.objects_to_render.append((depth, wall_column, wall_pos))
+            wall_columns.append((wall_column, wall_pos))
+        return wall_columns
 
     def ray_cast(self):
-        self.ray_casting_result = []
+        if self.engine == 'numpy':
+            self.ray_cast_numpy()
+        else:
+            self.ray_cast_python()
+            if np is not None:
+                self.ray_arrays = tuple(np.array(values) for values in zip(*self.ray_casting_result))
+        if self.ray_arrays is not None:
+            self.depth_buffer = self.ray_arrays[0]
+        else:
+            self.depth_buffer = [values[0] for values in self.ray_casting_result]
+
+    def ray_cast_python(self):
+        if self.thread_python:
+            self.ray_casting_result = []
+            for strip in self.map_strips(self.cast_python):
+                self.ray_casting_result.extend(strip)
+        else:
+            self.ray_casting_result = self.cast_python(0, self.num_rays)
+
+    def cast_python(self, first, last):
+        """(depth, proj_height, texture, offset) for rays first..last-1, one ray at a time."""
+        result = []
         texture_vert, texture_hor = 1, 1
         ox, oy = self.game.player.pos
         x_map, y_map = self.game.player.map_pos
+        get_tile = self.game.map.get_tile
+        delta_angle = self.delta_angle
 
-        ray_angle = self.game.player.angle - HALF_FOV + 0.0001
-        for ray in range(NUM_RAYS):
+        ray_angle = self.game.player.angle - HALF_FOV + 0.0001 + first * delta_angle
+        for ray in range(first, last):
             sin_a = math.sin(ray_angle)
             cos_a = math.cos(ray_angle)
 
@@ -54,9 +188,9 @@ class RayCasting:
             dx = delta_depth * cos_a
 
             for i in range(MAX_DEPTH):
-                tile_hor = int(x_hor), int(y_hor)
-                if tile_hor in self.game.map.world_map:
-                    texture_hor = self.game.map.world_map[tile_hor]
+                tile = get_tile(int(x_hor), int(y_hor))
+                if tile:
+                    texture_hor = tile
                     break
                 x_hor += dx
                 y_hor += dy
@@ -72,9 +206,9 @@ class RayCasting:
             dy = delta_depth * sin_a
 
             for i in range(MAX_DEPTH):
-                tile_vert = int(x_vert), int(y_vert)
-                if tile_vert in self.game.map.world_map:
-                    texture_vert = self.game.map.world_map[tile_vert]
+                tile = get_tile(int(x_vert), int(y_vert))
+                if tile:
+                    texture_vert = tile
                     break
                 x_vert += dx
                 y_vert += dy
@@ -97,9 +231,104 @@ class RayCasting:
             proj_height = SCREEN_DIST / (depth + 0.0001)
 
             # ray casting result
-            self.ray_casting_result.append((depth, proj_height, texture, offset))
+            result.append((depth, proj_height, texture, offset))
+
+            ray_angle += delta_angle
+        return result
+
+    def march_numpy(self, x, y, dx, dy, depth, delta_depth):
+        """
+        Step every ray MAX_DEPTH times along its grid lines at once.
+        Returns (depth, x, y, texture) at the first wall hit of each ray; rays that
+        hit nothing end after MAX_DEPTH steps with texture 1, like the python loop.
+        """
+        grid = self.game.map.grid_array
+        rows, cols = grid.shape
+        steps = self.depth_steps
+
+        xs = x[:, None] + steps * dx[:, None]
+        ys = y[:, None] + steps * dy[:, None]
+        # truncate toward zero, same as int() in the python engine
+        tile_x = xs.astype(np.intp)
+        tile_y = ys.astype(np.intp)
+
+        inside = (tile_x >= 0) & (tile_x < cols) & (tile_y >= 0) & (tile_y < rows)
+        values = np.zeros(xs.shape, dtype=np.uint8)
+        values[inside] = grid[tile_y[inside], tile_x[inside]]
+        hits = values != 0
+
+        hit = hits.any(axis=1)
+        first = np.where(hit, hits.argmax(axis=1), MAX_DEPTH)
+        texture = np.where(hit, values[self.ray_ids[:len(x)], np.minimum(first, MAX_DEPTH - 1)], 1)
+        return depth + first * delta_depth, x + first * dx, y + first * dy, texture
+
+    def ray_cast_numpy(self):
+        if self.executor is None:
+            depth, proj_height, texture, offset = self.cast_numpy(0, self.num_rays)
+        else:
+            # numpy drops the GIL inside its array loops, so strips overlap on the workers
+            strips = self.map_strips(self.cast_numpy)
+            depth, proj_height, texture, offset = (np.concatenate(arrays) for arrays in zip(*strips))
+
+        # same (depth, proj_height, texture, offset) tuples as the python engine
+        self.ray_arrays = depth, proj_height, texture, offset
+        self.ray_casting_result = list(zip(depth.tolist(), proj_height.tolist(),
+                                           texture.tolist(), offset.tolist()))
+
+    def cast_numpy(self, first, last):
+        """(depth, proj_height, texture, offset) arrays for rays first..last-1."""
+        # marched in grid coordinates: map coordinates minus the grid's origin (see StreamingMap)
+        origin_x, origin_y = self.game.map.origin
+        ox, oy = self.game.player.pos
+        ox, oy = ox - origin_x, oy - origin_y
+        x_map, y_map = self.game.player.map_pos
+        x_map, y_map = x_map - origin_x, y_map - origin_y
+        angle = self.game.player.angle
+
+        ray_angle = angle - HALF_FOV + 0.0001 + self.ray_ids[first:last] * self.delta_angle
+        sin_a = np.sin(ray_angle)
+        cos_a = np.cos(ray_angle)
+        up = sin_a > 0
+        right = cos_a > 0
+
+        # rays parallel to a grid axis give inf/nan, they never hit on that axis
+        with np.errstate(divide='ignore', invalid='ignore'):
+            # horizontals
+            y_hor = np.where(up, y_map + 1, y_map - 1e-6)
+            dy = np.where(up, 1.0, -1.0)
+            depth_hor = (y_hor - oy) / sin_a
+            x_hor = ox + depth_hor * cos_a
+            delta_depth = dy / sin_a
+            dx = delta_depth * cos_a
+            depth_hor, x_hor, y_hor, texture_hor = self.march_numpy(x_hor, y_hor, dx, dy,
+                                                                    depth_hor, delta_depth)
+
+            # verticals
+            x_vert = np.where(right, x_map + 1, x_map - 1e-6)
+            dx = np.where(right, 1.0, -1.0)
+            depth_vert = (x_vert - ox) / cos_a
+            y_vert = oy + depth_vert * sin_a
+            delta_depth = dx / cos_a
+            dy = delta_depth * sin_a
+            depth_vert, x_vert, y_vert, texture_vert = self.march_numpy(x_vert, y_vert, dx, dy,
+                                                                        depth_vert, delta_depth)
+
+            # depth, texture offset
+            vert = depth_vert < depth_hor
+            depth = np.where(vert, depth_vert, depth_hor)
+            texture = np.where(vert, texture_vert, texture_hor)
+            y_vert %= 1
+            x_hor %= 1
+            offset = np.where(vert,
+                              np.where(right, y_vert, 1 - y_vert),
+                              np.where(up, 1 - x_hor, x_hor))
+
+        # remove fishbowl effect
+        depth *= np.cos(angle - ray_angle)
 
-            ray_angle += DELTA_ANGLE
+        # projection
+        proj_height = SCREEN_DIST / (depth + 0.0001)
+        return depth, proj_height, texture, offset
 
     def update(self):
         self.ray_cast()
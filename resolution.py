@@ -0,0 +1,76 @@
+# resolution.py
+import pygame as pg
+from settings import *
+
+
+class ResolutionScaler:
+    """
+    Dynamic resolution: widens the wall columns (fewer rays, each drawn wider) while
+    frames run over RESOLUTION_TARGET_MS and narrows them again once there is headroom.
+    The view still covers the whole screen; only its horizontal detail changes.
+
+    Frame time is smoothed, and a level only changes after it has been over (or well
+    under) budget for a run of frames, with a dead band in between, so the scale
+    does not flicker around the target.
+    """
+
+    def __init__(self, game, enabled=DYNAMIC_RESOLUTION):
+        self.game = game
+        self.enabled = enabled
+        # column width per level, finest (the configured NUM_RAYS) first
+        self.column_widths = sorted({max(SCALE, round(SCALE / level)) for level in RESOLUTION_LEVELS})
+        self.level = 0
+        self.frame_ms = None
+        self.frames_over = 0
+        self.frames_under = 0
+        self.font = None
+
+    @property
+    def column_width(self):
+        return self.column_widths[self.level]
+
+    @property
+    def scale(self):
+        """Share of the configured ray count currently cast (1.0 = full resolution)."""
+        return SCALE / self.column_width
+
+    def apply(self):
+        """Push the current level to the (possibly just rebuilt) RayCasting."""
+        self.game.raycasting.set_column_width(self.column_width)
+
+    def set_level(self, level):
+        self.level = max(0, min(len(self.column_widths) - 1, level))
+        self.frames_over = self.frames_under = 0
+        self.apply()
+
+    def update(self, frame_ms):
+        """Feed the work time of the frame just rendered; may change the level for the next one."""
+        if not self.enabled:
+            return
+        if self.frame_ms is None:
+            self.frame_ms = frame_ms
+        self.frame_ms += (frame_ms - self.frame_ms) * RESOLUTION_SMOOTHING
+
+        if self.frame_ms > RESOLUTION_TARGET_MS * (1 + RESOLUTION_HYSTERESIS):
+            self.frames_over += 1
+            self.frames_under = 0
+        elif self.frame_ms < RESOLUTION_TARGET_MS * (1 - RESOLUTION_HYSTERESIS):
+            self.frames_under += 1
+            self.frames_over = 0
+        else:
+            self.frames_over = self.frames_under = 0
+
+        if self.frames_over >= RESOLUTION_DOWN_FRAMES and self.level < len(self.column_widths) - 1:
+            self.set_level(self.level + 1)
+        elif self.frames_under >= RESOLUTION_UP_FRAMES and self.level > 0:
+            self.set_level(self.level - 1)
+
+    def label(self):
+        frame_ms = self.frame_ms or 0.0
+        return f'res {self.scale:.0%}  {self.game.raycasting.num_rays} rays  {frame_ms:.1f} ms'
+
+    def draw(self, screen):
+        if self.font is None:
+            self.font = pg.font.Font(None, 24)
+        text = self.font.render(self.label(), True, 'white')
+        screen.blit(text, (10, screen.get_height() - text.get_height() - 10))
@@ -1,13 +1,18 @@
 # settings.py
+import os
 import math
 
 # ------------------- GAME WINDOW SETTINGS -------------------
-RES = WIDTH, HEIGHT = 1600, 900
+# DOOM_RES=WIDTHxHEIGHT overrides the window size (used by benchmarks/bench.py)
+RES = WIDTH, HEIGHT = tuple(int(v) for v in os.environ.get('DOOM_RES', '1600x900').split('x'))
 HALF_WIDTH = WIDTH // 2
 HALF_HEIGHT = HEIGHT // 2
 
-# Frame rate
+# Frame rate: rendering is capped at FPS, the simulation runs at a fixed TICK_RATE
 FPS = 60
+TICK_RATE = 60                     # simulation steps per second
+SIMULATION_STEP = 1000 / TICK_RATE # ms per simulation step
+MAX_FRAME_TIME = 250               # ms of real time simulated at most per rendered frame
 
 # ------------------- PLAYER SETTINGS -------------------
 PLAYER_POS = (1.5, 5)              # Player start position on map
@@ -27,7 +32,7 @@ MOUSE_BORDER_RIGHT = WIDTH - 100
 # ------------------- FIELD OF VIEW & RAYCASTING -------------------
 FOV = math.pi / 3                     # Field of view (60 degrees)
 HALF_FOV = FOV / 2
-NUM_RAYS = WIDTH // 2
+NUM_RAYS = int(os.environ.get('DOOM_NUM_RAYS', WIDTH // 2))
 HALF_NUM_RAYS = NUM_RAYS // 2
 DELTA_ANGLE = FOV / NUM_RAYS
 MAX_DEPTH = 20                        # Maximum visible raycasting distance
@@ -35,6 +40,63 @@ MAX_DEPTH = 20                        # Maximum visible raycasting distance
 SCREEN_DIST = HALF_WIDTH / math.tan(HALF_FOV)
 SCALE = WIDTH // NUM_RAYS
 
+# Raycasting engine: 'numpy' marches all rays at once on the map grid,
+# 'python' steps each ray in a plain loop (used when numpy is missing)
+RAYCAST_ENGINE = 'numpy'
+
+# Worker threads casting the screen in strips (0 or 1 keeps everything on the main
+# thread). The numpy engine and wall column scaling release the GIL; the python
+# engine is only split across threads on a free-threaded CPython build.
+RAYCAST_THREADS = 0
+
+# Dynamic resolution (see resolution.py): cast fewer, wider columns to hold the frame budget
+DYNAMIC_RESOLUTION = False
+RESOLUTION_TARGET_MS = 14.0           # frame work budget (ms), leaves headroom under 1000 / FPS
+RESOLUTION_HYSTERESIS = 0.15          # dead band around the target, as a fraction of it
+RESOLUTION_SMOOTHING = 0.1            # weight of each new frame in the smoothed frame time
+RESOLUTION_DOWN_FRAMES = 15           # frames over budget before dropping a level
+RESOLUTION_UP_FRAMES = 90             # frames under budget before raising a level
+RESOLUTION_LEVELS = (1.0, 0.75, 0.5, 0.375, 0.25)  # shares of NUM_RAYS to step through
+
+# Pre-scaled wall column strips kept by RayCasting (LRU, 0 disables the cache)
+WALL_COLUMN_CACHE_SIZE = 4096
+
+# Wall drawing: 'blit' scales a Surface per column, 'surfarray' writes texels
+# straight into the screen pixels with numpy (falls back to 'blit' without numpy)
+WALL_RENDERER = 'blit'
+
+# ------------------- MAP -------------------
+MAP_FILE = os.environ.get('DOOM_MAP') or None  # map file (map_file.py) streamed in chunks; None = built-in map
+MAP_CHUNK_SIZE = 16                   # tiles per chunk side when writing map files
+MAP_CHUNK_RADIUS = 3                  # resident chunks on each side of the window's centre chunk
+MAP_CHUNK_NPCS = 1                    # NPCs spawned in a streamed chunk the first time it loads
+MAP_PREPARE_CHUNKS = 1                # chunks near the window readied per tick before it moves there
+
+# ------------------- PATHFINDING -------------------
+PATHFINDING_ENGINE = 'bfs'            # 'bfs' or 'astar' per NPC, or 'flow_field' (one BFS from the player)
+PATH_CACHE_SIZE = 256                 # cached (start, goal) next steps, LRU (bfs/astar engines)
+
+# ------------------- OBJECTS -------------------
+SPATIAL_CELL_SIZE = 4                 # map tiles per spatial hash cell
+NPC_ACTIVE_RADIUS = MAX_DEPTH         # NPCs farther than this skip line-of-sight checks
+NPC_BACKEND = os.environ.get('DOOM_NPC_BACKEND', 'objects')  # 'objects' (NPC.update each) or 'arrays' (NPCStore, needs numpy)
+
+# NPC AI level of detail (ObjectHandler.schedule_npcs): engaged NPCs (alerted, in pain or
+# dying) think every tick; idle ones within AI_NEAR_RADIUS every AI_NEAR_INTERVAL ticks
+# and the rest every AI_FAR_INTERVAL ticks, staggered so each tick gets an even share
+AI_LOD = True
+AI_NEAR_RADIUS = 8                    # tiles
+AI_NEAR_INTERVAL = 3                  # ticks (20 Hz at TICK_RATE 60)
+AI_FAR_INTERVAL = 15                  # ticks (4 Hz)
+
+# Sprite mip chains (see assets.MipChain): projected sizes per octave, the tallest
+# size kept pre-scaled, and how many pre-scaled sizes stay cached across all sprites,
+# by count and by pixel bytes (near sprites are large, so the byte bound is what bites)
+SPRITE_MIP_STEPS = 16
+SPRITE_MIP_MAX_HEIGHT = HEIGHT
+SPRITE_MIP_CACHE_SIZE = 512
+SPRITE_MIP_CACHE_BYTES = 64 * 2 ** 20
+
 # ------------------- COLORS -------------------
 FLOOR_COLOR = (30, 30, 30)
 SKY_COLOR = (0, 0, 0)
@@ -42,9 +104,16 @@ SKY_COLOR = (0, 0, 0)
 # ------------------- TEXTURES -------------------
 TEXTURE_SIZE = 256
 HALF_TEXTURE_SIZE = TEXTURE_SIZE // 2
+ASSET_PACK = 'assets.pack'            # baked by asset_pack.py into resources/; loose files if missing
 
 # ------------------- SOUND / MUSIC SETTINGS -------------------
 SOUND_VOLUME = 0.3
 
 # ------------------- DEBUG -------------------
 DEBUG_MODE = False
+
+# Frame profiler (see profiler.py): toggle the overlay in game with PROFILER_KEY
+PROFILER_OVERLAY = False
+PROFILER_KEY = 'f3'                   # pygame key name
+PROFILER_WINDOW = 300                 # frames in the rolling p50/p95/p99 window
+PROFILER_HISTORY = 36000              # per-frame rows kept for export (10 min at 60 FPS)
@@ -0,0 +1,76 @@
+# spatial_hash.py
+import math
+
+
+class SpatialHash:
+    """
+    Uniform grid of buckets over objects with .x/.y map coordinates.
+    Objects are re-bucketed only when they cross into a new cell (see move).
+    """
+
+    def __init__(self, cell_size=4):
+        self.cell_size = cell_size
+        self.buckets = {}
+        self.cells = {}
+
+    def get_cell(self, x, y):
+        return int(x // self.cell_size), int(y // self.cell_size)
+
+    def insert(self, obj):
+        cell = self.get_cell(obj.x, obj.y)
+        self.cells[obj] = cell
+        self.buckets.setdefault(cell, set()).add(obj)
+
+    def remove(self, obj):
+        cell = self.cells.pop(obj, None)
+        if cell is None:
+            return
+        bucket = self.buckets[cell]
+        bucket.discard(obj)
+        if not bucket:
+            del self.buckets[cell]
+
+    def move(self, obj):
+        """Call after obj.x/obj.y changed; cheap when it stays in the same cell."""
+        cell = self.get_cell(obj.x, obj.y)
+        old_cell = self.cells.get(obj)
+        if cell == old_cell:
+            return
+        if old_cell is not None:
+            self.remove(obj)
+        self.cells[obj] = cell
+        self.buckets.setdefault(cell, set()).add(obj)
+
+    def query_radius(self, x, y, radius):
+        """Objects within `radius` of (x, y)."""
+        min_cx, min_cy = self.get_cell(x - radius, y - radius)
+        max_cx, max_cy = self.get_cell(x + radius, y + radius)
+        radius_sq = radius * radius
+        found = []
+        for cx in range(min_cx, max_cx + 1):
+            for cy in range(min_cy, max_cy + 1):
+                for obj in self.buckets.get((cx, cy), ()):
+                    if (obj.x - x) ** 2 + (obj.y - y) ** 2 <= radius_sq:
+                        found.append(obj)
+        return found
+
+    def query_cone(self, x, y, angle, half_angle, radius, pad=0.5):
+        """
+        Objects within `radius` of (x, y) whose direction is within `half_angle` of `angle`.
+        `pad` is an object's half-width in map units, so wide near objects whose
+        centre is just outside the cone are still returned.
+        """
+        found = []
+        for obj in self.query_radius(x, y, radius):
+            dx, dy = obj.x - x, obj.y - y
+            dist = math.hypot(dx, dy)
+            if dist <= pad:
+                found.append(obj)
+                continue
+            delta = (math.atan2(dy, dx) - angle + math.pi) % math.tau - math.pi
+            if abs(delta) <= half_angle + math.atan2(pad, dist):
+                found.append(obj)
+        return found
+
+    def __len__(self):
+        return len(self.cells)
@@ -2,55 +2,101 @@
 import os
 import math
 import pygame as pg
-from collections import deque
+from assets import FrameCursor, get_mips, lazy, list_images, load_frames, load_image, resolve
 from utils.resource_path import resource_path
 from settings import *
-from typing import Deque
 
 
-class SpriteObject:
-    def __init__(self, game, path=None,
-                 pos=(10.5, 3.5), scale=0.7, shift=0.27):
-        self.game = game
-        self.player = game.player
-        self.x, self.y = pos
-
-        # default sprite file (static sprite fallback)
-        if path is None:
-            path = resource_path('resources', 'sprites', 'static_sprites', 'candlebra.png')
+class SpriteSpec:
+    """
+    What every sprite built from the same image and arguments shares: the image, its
+    proportions, and the scale and height shift. Built once per type and arguments
+    (see SpriteObject.get_spec); instances only keep their own state.
+    """
+    __slots__ = ('image', 'image_width', 'image_half_width', 'image_ratio', 'scale', 'shift')
 
+    def __init__(self, path, scale, shift):
         # If user passed a directory, pick the first image file inside
         if os.path.isdir(path):
-            files = sorted([f for f in os.listdir(path) if os.path.isfile(os.path.join(path, f))])
-            # find first image-like file
-            img_files = [f for f in files if f.lower().endswith(('.png', '.jpg', '.jpeg'))]
+            img_files = list_images(path)
             if not img_files:
                 raise FileNotFoundError(f"No image files found in directory: {path}")
             path = os.path.join(path, img_files[0])
 
-        # load image
+        # load image (decoded once per process, shared between instances)
         try:
-            self.image = pg.image.load(path).convert_alpha()
+            self.image = load_image(path)
         except Exception as e:
             raise FileNotFoundError(f"Failed to load sprite image '{path}': {e}")
 
-        self.IMAGE_WIDTH = self.image.get_width()
-        self.IMAGE_HALF_WIDTH = self.image.get_width() // 2
-        self.IMAGE_RATIO = self.IMAGE_WIDTH / self.image.get_height()
+        # build the frame's mip chain now rather than on the first visible frame
+        get_mips(self.image)
+
+        self.image_width = self.image.get_width()
+        self.image_half_width = self.image_width // 2
+        self.image_ratio = self.image_width / self.image.get_height()
+        self.scale = scale
+        self.shift = shift
+
+
+class AnimatedSpriteSpec(SpriteSpec):
+    """SpriteSpec plus the animation: the frames folder, its frames and the frame period."""
+    __slots__ = ('path', 'frames', 'animation_time')
+
+    def __init__(self, path, scale, shift, animation_time):
+        super().__init__(path, scale, shift)
+        # a file path animates the frames in its directory
+        self.path = path if os.path.isdir(path) else os.path.dirname(path)
+        self.animation_time = animation_time
+        self.frames = AnimatedSprite.get_images(self.path).frames
+        # if there are no frames, try to ensure there is at least one frame (the base image)
+        if not self.frames:
+            self.frames = (self.image,)
+            print(f"[AnimatedSprite] No frames found in '{self.path}', using base image as single frame.")
+
+
+def lazy_frames(path):
+    """AssetHandle for the frames in `path`, decoded on first use or when prefetched."""
+    return lazy(('frames', resolve(path)), lambda: AnimatedSprite.get_images(path).frames)
+
+
+class SpriteObject:
+    Spec = SpriteSpec
+    __slots__ = ('game', 'player', 'spec', 'x', 'y', 'image', 'dx', 'dy', 'theta',
+                 'screen_x', 'dist', 'norm_dist', 'sprite_half_width', 'on_screen')
+
+    def __init__(self, game, path=None,
+                 pos=(10.5, 3.5), scale=0.7, shift=0.27, **spec_args):
+        self.game = game
+        self.player = game.player
+        self.x, self.y = pos
+
+        # default sprite file (static sprite fallback)
+        if path is None:
+            path = resource_path('resources', 'sprites', 'static_sprites', 'candlebra.png')
+
+        self.spec = self.get_spec(path, scale=scale, shift=shift, **spec_args)
+        self.image = self.spec.image
         self.dx, self.dy, self.theta, self.screen_x, self.dist, self.norm_dist = 0, 0, 0, 0, 1, 1
         self.sprite_half_width = 0
-        self.SPRITE_SCALE = scale
-        self.SPRITE_HEIGHT_SHIFT = shift
+        self.on_screen = False
+
+    @classmethod
+    def get_spec(cls, path, **spec_args):
+        """The shared cls.Spec for these arguments, built by the first instance that asks."""
+        key = ('spec', cls, path, tuple(sorted(spec_args.items())))
+        return lazy(key, lambda: cls.Spec(path, **spec_args)).get()
 
     def get_sprite_projection(self):
-        proj = SCREEN_DIST / self.norm_dist * self.SPRITE_SCALE
-        proj_width, proj_height = proj * self.IMAGE_RATIO, proj
+        spec = self.spec
+        proj = SCREEN_DIST / self.norm_dist * spec.scale
 
-        image = pg.transform.scale(self.image, (int(proj_width), int(proj_height)))
+        # nearest pre-scaled size from the frame's mip chain, centred on the exact projection
+        image = get_mips(self.image).get(proj, spec.image_ratio)
+        proj_width, proj_height = image.get_size()
 
-        self.sprite_half_width = proj_width // 2
-        height_shift = proj_height * self.SPRITE_HEIGHT_SHIFT
-        pos = (self.screen_x - self.sprite_half_width, HALF_HEIGHT - proj_height // 2 + height_shift)
+        height_shift = proj * spec.shift
+        pos = (self.screen_x - proj_width // 2, HALF_HEIGHT - proj_height // 2 + height_shift)
 
         # append depth-sorted object (norm_dist used to sort later)
         self.game.raycasting.objects_to_render.append((self.norm_dist, image, pos))
@@ -74,7 +120,15 @@ class SpriteObject:
         self.dist = math.hypot(dx, dy)
         # distance corrected for fisheye
         self.norm_dist = self.dist * math.cos(delta)
-        if -self.IMAGE_HALF_WIDTH < self.screen_x < (WIDTH + self.IMAGE_HALF_WIDTH) and self.norm_dist > 0.5:
+        spec = self.spec
+        self.on_screen = -spec.image_half_width < self.screen_x < (WIDTH + spec.image_half_width) and self.norm_dist > 0.5
+        if self.on_screen:
+            self.sprite_half_width = SCREEN_DIST / self.norm_dist * spec.scale * spec.image_ratio // 2
+
+    def project(self):
+        """Render pass: screen position for the current camera, then queue the scaled image."""
+        self.get_sprite()
+        if self.on_screen:
             self.get_sprite_projection()
 
     def update(self):
@@ -82,37 +136,20 @@ class SpriteObject:
 
 
 class AnimatedSprite(SpriteObject):
+    Spec = AnimatedSpriteSpec
+    __slots__ = ('images', 'animation_time_prev', 'animation_trigger')
+
     def __init__(self, game, path=None,
-                 pos=(11.5, 3.5), scale=0.8, shift=0.16, animation_time=120):
+                 pos=(11.5, 3.5), scale=0.8, shift=0.16, animation_time=120, **spec_args):
         # default to a folder of animated sprites
         if path is None:
             path = resource_path('resources', 'sprites', 'animated_sprites', 'green_light')
 
-        # If path is a directory, pick the first file inside to be the base image
-        if os.path.isdir(path):
-            files = sorted([f for f in os.listdir(path) if os.path.isfile(os.path.join(path, f))])
-            img_files = [f for f in files if f.lower().endswith(('.png', '.jpg', '.jpeg'))]
-            if not img_files:
-                raise FileNotFoundError(f"No image files found in directory: {path}")
-            first_image = os.path.join(path, img_files[0])
-            super().__init__(game, path=first_image, pos=pos, scale=scale, shift=shift)
-            self.path = path
-        else:
-            # path is a file: load that file as base image and determine directory for frames
-            super().__init__(game, path=path, pos=pos, scale=scale, shift=shift)
-            self.path = os.path.dirname(path)
-
-        self.animation_time = animation_time
-        self.images: Deque[pg.Surface] = self.get_images(self.path)
-        # if images deque is empty, try to ensure there is at least one frame (self.image is already set)
-        if not self.images:
-            # put the loaded base image as a single-frame animation
-            dq = deque()
-            dq.append(self.image)
-            self.images = dq
-            print(f"[AnimatedSprite] No frames found in '{self.path}', using base image as single frame.")
-
-        self.animation_time_prev = pg.time.get_ticks()
+        super().__init__(game, path=path, pos=pos, scale=scale, shift=shift,
+                         animation_time=animation_time, **spec_args)
+        # every sprite keeps its own position in the shared frames
+        self.images = FrameCursor(self.spec.frames)
+        self.animation_time_prev = game.get_ticks()
         self.animation_trigger = False
         # store image also for scaling in weapons etc.
         self.image = self.images[0]
@@ -122,53 +159,44 @@ class AnimatedSprite(SpriteObject):
         self.check_animation_time()
         self.animate(self.images)
 
-    def animate(self, images):
-        if self.animation_trigger and images:
+    def animate(self, images, trigger=None):
+        if trigger is None:
+            trigger = self.animation_trigger
+        if trigger and images:
             images.rotate(-1)
             self.image = images[0]
 
     def check_animation_time(self):
         self.animation_trigger = False
-        time_now = pg.time.get_ticks()
-        if time_now - self.animation_time_prev > self.animation_time:
+        time_now = self.game.get_ticks()
+        if time_now - self.animation_time_prev > self.spec.animation_time:
             self.animation_time_prev = time_now
             self.animation_trigger = True
 
-    def get_images(self, path):
+    @staticmethod
+    def get_images(path):
         """
-        Load images from `path` (a directory). Returns a deque of pygame Surfaces.
+        Load images from `path` (a directory). Returns a FrameCursor over shared frames:
+        each folder is decoded once per process and every sprite keeps its own position.
         Robust behaviors:
-          - If `path` is not a dir -> returns empty deque.
+          - If `path` is not a dir -> returns an empty cursor.
           - If `path` is empty, tries common subfolders like 'walk', 'idle', 'attack'.
           - If still empty, tries to fall back to soldier walk frames.
           - Prints helpful debug lines so you can see what was found.
         """
-        images = deque()
-
         # quick guard
         if not os.path.isdir(path):
-            # not a directory (caller may have passed a file); return empty deque
-            return images
+            # not a directory (caller may have passed a file); return empty cursor
+            return FrameCursor()
 
-        # collect valid image files (sorted for deterministic order)
         try:
-            files = sorted([f for f in os.listdir(path) if f.lower().endswith(('.png', '.jpg', '.jpeg'))])
+            frames = load_frames(path)
         except Exception as e:
             print(f"[get_images] Failed to list directory '{path}': {e}")
-            return images
-
-        if files:
-            for file_name in files:
-                file_path = os.path.join(path, file_name)
-                if os.path.isfile(file_path):
-                    try:
-                        img = pg.image.load(file_path).convert_alpha()
-                        images.append(img)
-                    except Exception as e:
-                        print(f"[get_images] failed to load image {file_path}: {e}")
-            if images:
-                print(f"[get_images] Loaded {len(images)} frames from: {path}")
-                return images
+            return FrameCursor()
+
+        if frames:
+            return FrameCursor(frames)
 
         # If nothing loaded, try common subfolders (walk, idle, attack, pain, death)
         common_subs = ['walk', 'idle', 'attack', 'pain', 'death', 'anim']
@@ -176,39 +204,23 @@ class AnimatedSprite(SpriteObject):
             subpath = os.path.join(path, sub)
             if os.path.isdir(subpath):
                 try:
-                    subfiles = sorted([f for f in os.listdir(subpath) if f.lower().endswith(('.png', '.jpg', '.jpeg'))])
+                    frames = load_frames(subpath)
                 except Exception:
-                    subfiles = []
-                if subfiles:
-                    for file_name in subfiles:
-                        file_path = os.path.join(subpath, file_name)
-                        try:
-                            img = pg.image.load(file_path).convert_alpha()
-                            images.append(img)
-                        except Exception as e:
-                            print(f"[get_images] failed to load image {file_path}: {e}")
-                    if images:
-                        print(f"[get_images] Loaded {len(images)} frames from subfolder: {subpath}")
-                        return images
+                    frames = ()
+                if frames:
+                    return FrameCursor(frames)
 
         # Fallback: try soldier walk frames (common fallback in this project)
         try:
             soldier_walk = resource_path('resources', 'sprites', 'npc', 'soldier', 'walk')
             if os.path.isdir(soldier_walk):
-                fallback_files = sorted([f for f in os.listdir(soldier_walk) if f.lower().endswith(('.png', '.jpg', '.jpeg'))])
-                for file_name in fallback_files:
-                    file_path = os.path.join(soldier_walk, file_name)
-                    try:
-                        img = pg.image.load(file_path).convert_alpha()
-                        images.append(img)
-                    except Exception:
-                        continue
-                if images:
-                    print(f"[get_images] WARNING: '{path}' had no frames, used soldier fallback ({len(images)} frames).")
-                    return images
+                frames = load_frames(soldier_walk)
+                if frames:
+                    print(f"[get_images] WARNING: '{path}' had no frames, used soldier fallback ({len(frames)} frames).")
+                    return FrameCursor(frames)
         except Exception:
             pass
 
         # final: nothing found
         print(f"[get_images] WARNING: no image frames found for path: {path}")
-        return images
+        return FrameCursor()
@@ -0,0 +1,77 @@
+# utils/lru.py
+from collections import OrderedDict
+
+
+class LRUCache:
+    """
+    Bounded least-recently-used cache with hit/miss/eviction counters.
+    maxsize <= 0 disables caching: every get is a miss and put stores nothing.
+    With `weigh`, the summed weigh(value) of the entries is also kept under
+    `maxweight` (e.g. bytes of pixels), evicting the oldest entries first.
+    """
+
+    def __init__(self, maxsize=1024, maxweight=None, weigh=None):
+        self.maxsize = maxsize
+        self.maxweight = maxweight
+        self.weigh = weigh
+        self.data = OrderedDict()
+        # key -> weigh(value), and their sum (only with weigh)
+        self.weights = {}
+        self.weight = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key, default=None):
+        try:
+            value = self.data[key]
+        except KeyError:
+            self.misses += 1
+            return default
+        self.data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key, value):
+        if self.maxsize <= 0:
+            return
+        self.data[key] = value
+        self.data.move_to_end(key)
+        if self.weigh is not None:
+            weight = self.weigh(value)
+            self.weight += weight - self.weights.get(key, 0)
+            self.weights[key] = weight
+            # the newest entry is kept even if it alone is over maxweight
+            while self.weight > self.maxweight and len(self.data) > 1:
+                self.evict()
+        if len(self.data) > self.maxsize:
+            self.evict()
+
+    def evict(self):
+        """Drop the least recently used entry."""
+        key, _ = self.data.popitem(last=False)
+        if self.weigh is not None:
+            self.weight -= self.weights.pop(key)
+        self.evictions += 1
+
+    def clear(self):
+        """Drop every entry; counters are kept (see reset_stats)."""
+        self.data.clear()
+        self.weights.clear()
+        self.weight = 0
+
+    def reset_stats(self):
+        self.hits = self.misses = self.evictions = 0
+
+    def info(self):
+        info = {'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions,
+                'size': len(self.data), 'maxsize': self.maxsize}
+        if self.weigh is not None:
+            info.update(weight=self.weight, maxweight=self.maxweight)
+        return info
+
+    def __len__(self):
+        return len(self.data)
+
+    def __contains__(self, key):
+        return key in self.data
@@ -0,0 +1,96 @@
+# wall_renderer.py
+import pygame as pg
+from settings import *
+
+# numpy is optional: without it ObjectRenderer keeps the per-column blit path
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+class WallRenderer:
+    """
+    Writes wall texels straight into the screen's pixel array.
+    One numpy gather of the texels under the walls replaces the per-column
+    Surfaces of RayCasting.get_objects_to_render; the per-ray depths it draws from
+    are left in RayCasting.depth_buffer for sprite depth testing.
+    """
+
+    def __init__(self, game, wall_textures):
+        self.game = game
+        self.screen = game.screen
+        # texture id -> slot in the stacked texel array (slot 0 stays unused)
+        texture_ids = sorted(wall_textures)
+        self.texture_slot = np.zeros(max(texture_ids) + 1, dtype=np.intp)
+        # texels as screen-format pixels, laid out [slot, row, column]
+        self.texels = np.zeros((len(texture_ids) + 1, TEXTURE_SIZE, TEXTURE_SIZE), dtype=np.uint32)
+        for slot, texture_id in enumerate(texture_ids, start=1):
+            self.texture_slot[texture_id] = slot
+            self.texels[slot] = pg.surfarray.map_array(self.screen, pg.surfarray.array3d(wall_textures[texture_id])).T
+        # column width -> texel runs; see get_texel_runs
+        self.texel_runs = {}
+        self.screen_y = np.arange(HEIGHT, dtype=np.float32)[:, None]
+        # (HEIGHT, num_rays) scratch arrays reused every frame; see get_buffers
+        self.buffers = None
+
+    def get_texel_runs(self, scale):
+        """
+        Every run of `scale` neighbouring texels in a texture row as one item, laid out
+        [slot, first column, row] and flattened: a ray `scale` pixels wide draws one
+        run per wall pixel, and the runs of one texture column follow each other.
+        """
+        texel_runs = self.texel_runs.get(scale)
+        if texel_runs is None:
+            runs = np.lib.stride_tricks.sliding_window_view(self.texels, scale, axis=2)
+            runs = np.ascontiguousarray(runs.transpose(0, 2, 1, 3))
+            texel_runs = runs.view(np.dtype((np.void, 4 * scale))).ravel()
+            self.texel_runs[scale] = texel_runs
+        return texel_runs
+
+    def get_buffers(self, num_rays):
+        """Per-pixel scratch arrays for num_rays rays, kept while the ray count holds."""
+        if self.buffers is None or self.buffers[0].shape[1] != num_rays:
+            shape = HEIGHT, num_rays
+            self.buffers = np.empty(shape, np.float32), np.empty(shape, bool), np.empty(shape, np.intp)
+        return self.buffers
+
+    def draw(self):
+        raycasting = self.game.raycasting
+        scale = raycasting.scale
+        depth, proj_height, texture, offset = raycasting.ray_arrays
+        proj_height = proj_height.astype(np.float32)
+        texel_runs = self.get_texel_runs(scale)
+
+        # only the rows some wall reaches: the band around the horizon
+        top = HALF_HEIGHT - proj_height // 2
+        first_row = max(int(top.min()), 0)
+        last_row = min(int(np.ceil((top + proj_height).max())), HEIGHT)
+
+        # (rows, num_rays) arrays: is the pixel on the wall, and which texel run it shows
+        y, mask, index = (buffer[:last_row - first_row] for buffer in self.get_buffers(len(proj_height)))
+        np.subtract(self.screen_y[first_row:last_row], top, out=y)
+        # y is a whole number and proj_height positive, so comparing their bits as
+        # unsigned ints tests 0 <= y < proj_height in one pass (negative y has the sign bit)
+        np.less(y.view(np.uint32), proj_height.view(np.uint32), out=mask)
+        y *= TEXTURE_SIZE / proj_height
+        np.copyto(index, y, casting='unsafe')
+        np.minimum(index, TEXTURE_SIZE - 1, out=index)
+        tex_x = (offset * (TEXTURE_SIZE - scale)).astype(np.intp)
+        index += (self.texture_slot[texture] * (TEXTURE_SIZE - scale + 1) + tex_x) * TEXTURE_SIZE
+
+        # transposed so rows come first, matching the arrays above
+        pixels = pg.surfarray.pixels2d(self.screen).T[first_row:last_row]
+        try:
+            # gather only the wall pixels, one run of `scale` screen columns each
+            whole = WIDTH // scale
+            wall = mask[:, :whole]
+            pixels[:, :whole * scale].view(texel_runs.dtype)[wall] = np.take(texel_runs, index[:, :whole][wall])
+            # the last ray may start less than `scale` pixels from the right edge
+            if whole < len(proj_height):
+                wall = mask[:, whole]
+                runs = np.take(texel_runs, index[:, whole][wall]).view(np.uint32).reshape(-1, scale)
+                pixels[wall, whole * scale:] = runs[:, :WIDTH - whole * scale]
+        finally:
+            # release the surface lock before anything else blits to the screen
+            del pixels
@@ -1,11 +1,26 @@
 # weapon.py
 from sprite_object import *
-from collections import deque
 from utils.resource_path import resource_path
 import pygame as pg
 
 
+class WeaponSpec(AnimatedSpriteSpec):
+    """AnimatedSpriteSpec with the frames scaled to the weapon's size on screen."""
+    __slots__ = ()
+
+    def __init__(self, path, scale, shift, animation_time):
+        super().__init__(path, scale, shift, animation_time)
+        # scale each frame to weapon scale (use int sizes)
+        self.frames = tuple(
+            pg.transform.smoothscale(img, (int(img.get_width() * scale), int(img.get_height() * scale)))
+            for img in self.frames
+        )
+
+
 class Weapon(AnimatedSprite):
+    Spec = WeaponSpec
+    __slots__ = ('weapon_pos', 'reloading', 'num_images', 'frame_counter', 'damage')
+
     def __init__(self, game, path=None, scale=0.4, animation_time=90):
         # default weapons folder or file
         if path is None:
@@ -13,19 +28,6 @@ class Weapon(AnimatedSprite):
 
         super().__init__(game=game, path=path, scale=scale, animation_time=animation_time)
 
-        # scale each frame to weapon scale (use int sizes)
-        self.images = deque(
-            [pg.transform.smoothscale(img,
-                                      (int(img.get_width() * scale), int(img.get_height() * scale)))
-             for img in self.images]
-        )
-
-        if not self.images:
-            # fallback to the currently loaded image as single frame
-            self.images = deque([pg.transform.smoothscale(self.image,
-                                                         (int(self.image.get_width() * scale),
-                                                          int(self.image.get_height() * scale)))])
-
         # initial weapon position (centered horizontally, bottom vertically)
         self.weapon_pos = (HALF_WIDTH - self.images[0].get_width() // 2,
                            HEIGHT - self.images[0].get_height())
@@ -34,6 +36,13 @@ class Weapon(AnimatedSprite):
         self.frame_counter = 0
         self.damage = 50
 
+    def reset(self):
+        """Back to the idle frame, e.g. when a new round starts mid-reload."""
+        self.images.rotate(self.frame_counter)
+        self.image = self.images[0]
+        self.reloading = False
+        self.frame_counter = 0
+
     def animate_shot(self):
         if self.reloading:
             self.game.player.shot = False